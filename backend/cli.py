@@ -1,23 +1,135 @@
 #!/usr/bin/env python3
 import click
+import codecs
+import functools
+import importlib
 import os
 import sys
+from pathlib import Path
 from colorama import Fore, Style, init
 
-init(autoreset=True)
+from stego.metadata import pack_header, parse_header
 
-from stego.lsb_encoder import encode_lsb
-from stego.lsb_decoder import decode_lsb
-from stego.audio_wav_encoder import encode_audio_lsb
-from stego.audio_wav_decoder import decode_audio_lsb
-from stego.video_encoder import encode_video_lsb
-from stego.video_decoder import decode_video_lsb
-from stego.dct_encoder import encode_dct
-from stego.dct_decoder import decode_dct
-from stego.dwt_encoder import encode_dwt
-from stego.dwt_decoder import decode_dwt
-from stego.crypto import encrypt_payload, decrypt_payload
-from stego.analyzer import analyze_image
+
+class _NoColor:
+    """Stand-in for colorama's Fore/Style when stdout is not a terminal."""
+    
+    def __getattr__(self, name):
+        return ''
+
+
+if sys.stdout.isatty():
+    init(autoreset=True)
+    _Fore, _Style = Fore, Style
+else:
+    # Piped output gets no escape codes and no colorama stdout wrapper
+    _Fore = _Style = _NoColor()
+
+# Backends pull in numpy/OpenCV/PyWavelets/pycryptodome, so they are imported
+# on demand; `--help` and `analyze` only pay for what they use. Each entry is
+# (module, function, adapter) where the adapter maps CLI options onto the
+# backend's signature.
+_ENCODERS = {
+    'lsb': ('stego.lsb_encoder', 'encode_lsb',
+            lambda fn, carrier, payload, output, opts: fn(carrier, payload, output, opts['bits'])),
+    'dct': ('stego.dct_encoder', 'encode_dct',
+            lambda fn, carrier, payload, output, opts: fn(carrier, payload, output, opts['strength'])),
+    'dwt': ('stego.dwt_encoder', 'encode_dwt',
+            lambda fn, carrier, payload, output, opts: fn(carrier, payload, output, opts['wavelet'], opts['strength'])),
+    'audio': ('stego.audio_wav_encoder', 'encode_audio_lsb',
+              lambda fn, carrier, payload, output, opts: fn(carrier, payload, output, opts['bits'])),
+    'video': ('stego.video_encoder', 'encode_video_lsb',
+              lambda fn, carrier, payload, output, opts: fn(
+                  carrier,
+                  payload,
+                  output,
+                  opts['bits'],
+                  opts['frame_skip'],
+                  use_uncompressed=True,  # Use lossless codec
+                  store_params=True       # Store parameters for auto-detection
+              )),
+}
+
+_DECODERS = {
+    'lsb': ('stego.lsb_decoder', 'decode_lsb',
+            lambda fn, stego, opts: fn(stego, 1 if opts['bits'] is None else opts['bits'])),
+    'dct': ('stego.dct_decoder', 'decode_dct',
+            lambda fn, stego, opts: fn(stego, opts['strength'])),
+    'dwt': ('stego.dwt_decoder', 'decode_dwt',
+            lambda fn, stego, opts: fn(stego, opts['wavelet'], opts['strength'])),
+    'audio': ('stego.audio_wav_decoder', 'decode_audio_lsb',
+              lambda fn, stego, opts: fn(stego, 2 if opts['bits'] is None else opts['bits'])),
+    'video': ('stego.video_decoder', 'decode_video_lsb',
+              lambda fn, stego, opts: fn(stego, opts['bits'], opts['frame_skip'], opts['auto_detect'])),
+}
+
+
+def _load_backend(table: dict, algorithm: str):
+    module_name, attr, adapter = table[algorithm]
+    return functools.partial(adapter, getattr(importlib.import_module(module_name), attr))
+
+
+def _load_payload(path: str) -> bytearray:
+    """Read a payload file into a preallocated buffer in a single pass."""
+    size = os.path.getsize(path)
+    buf = bytearray(size)
+    with open(path, 'rb', buffering=0) as f:
+        view = memoryview(buf)
+        read = 0
+        while read < size:
+            n = f.readinto(view[read:])
+            if not n:
+                break
+            read += n
+    if read < size:
+        del buf[read:]
+    return buf
+
+
+_TEXT_PROBE_SIZE = 4096
+
+
+def _looks_like_text(data) -> bool:
+    """Cheap UTF-8 check on the head of the payload so binary data fails fast."""
+    if data.isascii():
+        return True
+    
+    # Incremental decoder tolerates a multi-byte sequence cut off by the probe window
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(data[:_TEXT_PROBE_SIZE], final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+class StegoError(click.ClickException):
+    """Command failure reported by Click as a red 'Error: ...' line with exit status 1."""
+    
+    def format_message(self):
+        return click.style(self.message, fg='red')
+
+
+class _Echoer:
+    """Collects output lines and writes each section to stdout in a single call."""
+    
+    def __init__(self):
+        self._lines = []
+    
+    def __enter__(self):
+        return self
+    
+    def __call__(self, message: str = ''):
+        self._lines.append(message)
+    
+    def flush(self):
+        if self._lines:
+            click.echo('\n'.join(self._lines))
+            self._lines = []
+    
+    def __exit__(self, exc_type, exc, tb):
+        # Also runs when a command fails, so queued lines are written before the error message
+        self.flush()
+        return False
 
 
 @click.group()
@@ -38,59 +150,50 @@ def cli():
 @click.option('--frame-skip', type=int, default=1, help='Frame skip for video (1=every frame)')
 def encode(carrier, payload, output, algorithm, bits, key, strength, wavelet, frame_skip):
     try:
-        click.echo(f"{Fore.CYAN}SteganoGen - Encoding{Style.RESET_ALL}")
-        click.echo(f"Carrier: {carrier}")
-        click.echo(f"Algorithm: {algorithm.upper()}")
-        
-        if payload.startswith('file:'):
-            payload_path = payload[5:]
-            if not os.path.exists(payload_path):
-                click.echo(f"{Fore.RED}Error: Payload file not found: {payload_path}{Style.RESET_ALL}")
-                sys.exit(1)
-            with open(payload_path, 'rb') as f:
-                payload_bytes = f.read()
-            click.echo(f"Payload: File ({len(payload_bytes)} bytes)")
-        else:
-            payload_bytes = payload.encode('utf-8')
-            click.echo(f"Payload: Text ({len(payload_bytes)} bytes)")
-        
-        if key:
-            encrypted = encrypt_payload(payload_bytes, key)
-            payload_bytes = encrypted['encrypted_data']
-            metadata = f"STEGANO|True|{encrypted['iv'].hex()}|".encode('utf-8')
-            payload_bytes = metadata + payload_bytes
-            click.echo(f"{Fore.GREEN}Encryption: Enabled{Style.RESET_ALL}")
-        else:
-            metadata = b"STEGANO|False||"
-            payload_bytes = metadata + payload_bytes
-        
-        if algorithm == 'lsb':
-            result = encode_lsb(carrier, payload_bytes, output, bits)
-        elif algorithm == 'dct':
-            result = encode_dct(carrier, payload_bytes, output, strength)
-        elif algorithm == 'dwt':
-            result = encode_dwt(carrier, payload_bytes, output, wavelet, strength)
-        elif algorithm == 'audio':
-            result = encode_audio_lsb(carrier, payload_bytes, output, bits)
-        elif algorithm == 'video':
-            result = encode_video_lsb(
-                carrier, 
-                payload_bytes, 
-                output, 
-                bits, 
-                frame_skip,
-                use_uncompressed=True,  # Use lossless codec
-                store_params=True       # Store parameters for auto-detection
-            )
-        
-        click.echo(f"{Fore.GREEN}✓ Encoding successful!{Style.RESET_ALL}")
-        click.echo(f"Output: {output}")
-        click.echo(f"Capacity used: {result['capacity_used']:.2f}%")
-        click.echo(f"Payload size: {result['payload_size']} bytes")
-        
+        with _Echoer() as echo:
+            echo(f"{_Fore.CYAN}SteganoGen - Encoding{_Style.RESET_ALL}")
+            echo(f"Carrier: {carrier}")
+            echo(f"Algorithm: {algorithm.upper()}")
+            
+            if payload.startswith('file:'):
+                payload_path = payload[5:]
+                if not os.path.exists(payload_path):
+                    raise StegoError(f"Payload file not found: {payload_path}")
+                payload_bytes = _load_payload(payload_path)
+                echo(f"Payload: File ({len(payload_bytes)} bytes)")
+            else:
+                payload_bytes = payload.encode('utf-8')
+                echo(f"Payload: Text ({len(payload_bytes)} bytes)")
+            
+            iv = None
+            if key:
+                from stego.crypto import encrypt_payload
+                encrypted = encrypt_payload(payload_bytes, key)
+                payload_bytes = encrypted['encrypted_data']
+                iv = encrypted['iv']
+                echo(f"{_Fore.GREEN}Encryption: Enabled{_Style.RESET_ALL}")
+            
+            # Single allocation for header + payload instead of a concatenation copy
+            payload_bytes = b"".join((pack_header(iv), payload_bytes))
+            
+            echo.flush()
+            encoder = _load_backend(_ENCODERS, algorithm)
+            result = encoder(carrier, payload_bytes, output, {
+                'bits': bits,
+                'strength': strength,
+                'wavelet': wavelet,
+                'frame_skip': frame_skip,
+            })
+            
+            echo(f"{_Fore.GREEN}✓ Encoding successful!{_Style.RESET_ALL}")
+            echo(f"Output: {output}")
+            echo(f"Capacity used: {result['capacity_used']:.2f}%")
+            echo(f"Payload size: {result['payload_size']} bytes")
+            
+    except click.ClickException:
+        raise
     except Exception as e:
-        click.echo(f"{Fore.RED}Error: {str(e)}{Style.RESET_ALL}")
-        sys.exit(1)
+        raise StegoError(str(e))
 
 
 @cli.command()
@@ -105,103 +208,109 @@ def encode(carrier, payload, output, algorithm, bits, key, strength, wavelet, fr
 @click.option('--no-auto-detect', is_flag=True, help='Disable auto-detection for video (use provided parameters)')
 def decode(stego, output, algorithm, bits, key, strength, wavelet, frame_skip, no_auto_detect):
     try:
-        click.echo(f"{Fore.CYAN}SteganoGen - Decoding{Style.RESET_ALL}")
-        click.echo(f"Stego file: {stego}")
-        click.echo(f"Algorithm: {algorithm.upper()}")
-        
-        if algorithm == 'lsb':
-            if bits is None:
-                bits = 1
-            extracted_bytes = decode_lsb(stego, bits)
-        elif algorithm == 'dct':
-            extracted_bytes = decode_dct(stego, strength)
-        elif algorithm == 'dwt':
-            extracted_bytes = decode_dwt(stego, wavelet, strength)
-        elif algorithm == 'audio':
-            if bits is None:
-                bits = 2
-            extracted_bytes = decode_audio_lsb(stego, bits)
-        elif algorithm == 'video':
+        with _Echoer() as echo:
+            echo(f"{_Fore.CYAN}SteganoGen - Decoding{_Style.RESET_ALL}")
+            echo(f"Stego file: {stego}")
+            echo(f"Algorithm: {algorithm.upper()}")
+            
+            echo.flush()
+            decoder = _load_backend(_DECODERS, algorithm)
+            
             auto_detect = not no_auto_detect
-            if auto_detect:
-                click.echo(f"{Fore.CYAN}Auto-detecting parameters from video...{Style.RESET_ALL}")
-            extracted_bytes = decode_video_lsb(stego, bits, frame_skip, auto_detect)
-        
-        is_encrypted = False
-        metadata_parts = extracted_bytes.split(b'|', 3)
-        
-        if len(metadata_parts) >= 4 and metadata_parts[0] == b'STEGANO':
-            is_encrypted = metadata_parts[1] == b'True'
-            iv_hex = metadata_parts[2].decode('utf-8')
-            payload_bytes = metadata_parts[3]
-            
-            if is_encrypted:
-                if not key:
-                    click.echo(f"{Fore.RED}Error: Payload is encrypted. Provide decryption key with --key{Style.RESET_ALL}")
-                    sys.exit(1)
+            if algorithm == 'video' and auto_detect:
+                echo(f"{_Fore.CYAN}Auto-detecting parameters from video...{_Style.RESET_ALL}")
+                echo.flush()
+            
+            extracted_bytes = decoder(stego, {
+                'bits': bits,
+                'strength': strength,
+                'wavelet': wavelet,
+                'frame_skip': frame_skip,
+                'auto_detect': auto_detect,
+            })
+            
+            header = parse_header(extracted_bytes)
+            
+            if header is not None:
+                is_encrypted, iv, body_offset = header
+                payload_bytes = extracted_bytes[body_offset:]
                 
-                iv = bytes.fromhex(iv_hex)
-                payload_bytes = decrypt_payload(payload_bytes, iv, key)
-                click.echo(f"{Fore.GREEN}Decryption: Successful{Style.RESET_ALL}")
-        else:
-            payload_bytes = extracted_bytes
-        
-        if output:
-            with open(output, 'wb') as f:
-                f.write(payload_bytes)
-            click.echo(f"{Fore.GREEN}✓ Decoding successful!{Style.RESET_ALL}")
-            click.echo(f"Output saved to: {output}")
-            click.echo(f"Size: {len(payload_bytes)} bytes")
-        else:
-            try:
-                payload_text = payload_bytes.decode('utf-8')
-                click.echo(f"{Fore.GREEN}✓ Decoding successful!{Style.RESET_ALL}")
-                click.echo(f"Extracted payload (text):")
-                click.echo(f"{Fore.YELLOW}{payload_text}{Style.RESET_ALL}")
-            except UnicodeDecodeError:
-                click.echo(f"{Fore.GREEN}✓ Decoding successful!{Style.RESET_ALL}")
-                click.echo(f"Extracted payload (binary, {len(payload_bytes)} bytes)")
-                click.echo(f"Use --output to save binary data to file")
-        
+                if is_encrypted:
+                    if not key:
+                        raise StegoError("Payload is encrypted. Provide decryption key with --key")
+                    
+                    from stego.crypto import decrypt_payload
+                    payload_bytes = decrypt_payload(payload_bytes, iv, key)
+                    echo(f"{_Fore.GREEN}Decryption: Successful{_Style.RESET_ALL}")
+            else:
+                payload_bytes = extracted_bytes
+            
+            if output:
+                Path(output).write_bytes(payload_bytes)
+                echo(f"{_Fore.GREEN}✓ Decoding successful!{_Style.RESET_ALL}")
+                echo(f"Output saved to: {output}")
+                echo(f"Size: {len(payload_bytes)} bytes")
+            else:
+                payload_text = None
+                if _looks_like_text(payload_bytes):
+                    try:
+                        payload_text = payload_bytes.decode('utf-8')
+                    except UnicodeDecodeError:
+                        pass
+                
+                if payload_text is not None:
+                    echo(f"{_Fore.GREEN}✓ Decoding successful!{_Style.RESET_ALL}")
+                    echo(f"Extracted payload (text):")
+                    echo(f"{_Fore.YELLOW}{payload_text}{_Style.RESET_ALL}")
+                else:
+                    echo(f"{_Fore.GREEN}✓ Decoding successful!{_Style.RESET_ALL}")
+                    echo(f"Extracted payload (binary, {len(payload_bytes)} bytes)")
+                    echo(f"Use --output to save binary data to file")
+            
+    except click.ClickException:
+        raise
     except Exception as e:
-        click.echo(f"{Fore.RED}Error: {str(e)}{Style.RESET_ALL}")
-        sys.exit(1)
+        raise StegoError(str(e))
 
 
 @cli.command()
 @click.argument('image', type=click.Path(exists=True))
 def analyze(image):
     try:
-        click.echo(f"{Fore.CYAN}SteganoGen - Image Analysis{Style.RESET_ALL}")
-        click.echo(f"Analyzing: {image}")
-        
-        stats = analyze_image(image)
-        
-        click.echo(f"\n{Fore.YELLOW}Image Properties:{Style.RESET_ALL}")
-        click.echo(f"  Dimensions: {stats['width']}x{stats['height']}")
-        click.echo(f"  Format: {stats['format']}")
-        click.echo(f"  Total Pixels: {stats['total_pixels']:,}")
-        
-        click.echo(f"\n{Fore.YELLOW}Quality Metrics:{Style.RESET_ALL}")
-        click.echo(f"  Entropy: {stats['entropy']} bits")
-        click.echo(f"  Variance: {stats['variance']}")
-        click.echo(f"  Edge Density: {stats['edge_density']}")
-        click.echo(f"  Texture Score: {stats['texture_score']}")
-        click.echo(f"  Noise Level: {stats['noise_level']}")
-        click.echo(f"  Uniformity: {stats['uniformity']}")
-        click.echo(f"  Smoothness: {stats['smoothness']}")
-        
-        click.echo(f"\n{Fore.YELLOW}Capacity Analysis:{Style.RESET_ALL}")
-        click.echo(f"  1 bit/channel: {stats['capacity_at_1bit']:,} bytes ({stats['capacity_at_1bit'] / 1024:.2f} KB)")
-        click.echo(f"  2 bits/channel: {stats['capacity_at_2bit']:,} bytes ({stats['capacity_at_2bit'] / 1024:.2f} KB)")
-        click.echo(f"  4 bits/channel: {stats['capacity_at_4bit']:,} bytes ({stats['capacity_at_4bit'] / 1024:.2f} KB)")
-        
-        click.echo(f"\n{Fore.YELLOW}Suitability:{Style.RESET_ALL}")
-        click.echo(f"  {stats['suitability']}")
-        
+        with _Echoer() as echo:
+            echo(f"{_Fore.CYAN}SteganoGen - Image Analysis{_Style.RESET_ALL}")
+            echo(f"Analyzing: {image}")
+            
+            echo.flush()
+            from stego.analyzer import analyze_image
+            stats = analyze_image(image)
+            
+            echo(f"\n{_Fore.YELLOW}Image Properties:{_Style.RESET_ALL}")
+            echo(f"  Dimensions: {stats['width']}x{stats['height']}")
+            echo(f"  Format: {stats['format']}")
+            echo(f"  Total Pixels: {stats['total_pixels']:,}")
+            
+            echo(f"\n{_Fore.YELLOW}Quality Metrics:{_Style.RESET_ALL}")
+            echo(f"  Entropy: {stats['entropy']} bits")
+            echo(f"  Variance: {stats['variance']}")
+            echo(f"  Edge Density: {stats['edge_density']}")
+            echo(f"  Texture Score: {stats['texture_score']}")
+            echo(f"  Noise Level: {stats['noise_level']}")
+            echo(f"  Uniformity: {stats['uniformity']}")
+            echo(f"  Smoothness: {stats['smoothness']}")
+            
+            echo(f"\n{_Fore.YELLOW}Capacity Analysis:{_Style.RESET_ALL}")
+            echo(f"  1 bit/channel: {stats['capacity_at_1bit']:,} bytes ({stats['capacity_at_1bit'] / 1024:.2f} KB)")
+            echo(f"  2 bits/channel: {stats['capacity_at_2bit']:,} bytes ({stats['capacity_at_2bit'] / 1024:.2f} KB)")
+            echo(f"  4 bits/channel: {stats['capacity_at_4bit']:,} bytes ({stats['capacity_at_4bit'] / 1024:.2f} KB)")
+            
+            echo(f"\n{_Fore.YELLOW}Suitability:{_Style.RESET_ALL}")
+            echo(f"  {stats['suitability']}")
+            
+    except click.ClickException:
+        raise
     except Exception as e:
-        click.echo(f"{Fore.RED}Error: {str(e)}{Style.RESET_ALL}")
-        sys.exit(1)
+        raise StegoError(str(e))
 
 
 if __name__ == '__main__':
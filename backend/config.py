@@ -1,44 +1,115 @@
 import os
-from typing import Dict, Any
-
-
-ALGORITHM_PROFILES = {
-    'stealth': {
-        'name': 'Maximum Stealth',
-        'description': 'Minimal detectability, lower capacity',
-        'lsb': {'bits_per_channel': 1},
-        'dct': {'strength': 5.0},
-        'dwt': {'strength': 0.05, 'wavelet': 'haar'},
-        'audio': {'bits_per_sample': 1},
-        'video': {'bits_per_channel': 1, 'frame_skip': 2}
-    },
-    'balanced': {
-        'name': 'Balanced',
-        'description': 'Good balance between capacity and stealth',
-        'lsb': {'bits_per_channel': 2},
-        'dct': {'strength': 10.0},
-        'dwt': {'strength': 0.1, 'wavelet': 'haar'},
-        'audio': {'bits_per_sample': 2},
-        'video': {'bits_per_channel': 2, 'frame_skip': 1}
-    },
-    'capacity': {
-        'name': 'Maximum Capacity',
-        'description': 'Higher capacity, more detectable',
-        'lsb': {'bits_per_channel': 4},
-        'dct': {'strength': 20.0},
-        'dwt': {'strength': 0.2, 'wavelet': 'db1'},
-        'audio': {'bits_per_sample': 4},
-        'video': {'bits_per_channel': 4, 'frame_skip': 1}
-    }
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Union
+
+
+# Profiles are plain slotted records: attribute reads avoid per-call dict
+# lookups, and frozen instances are safe to hand out from cached lookups.
+@dataclass(frozen=True)
+class LSBParams:
+    __slots__ = ('bits_per_channel',)
+    bits_per_channel: int
+
+
+@dataclass(frozen=True)
+class DCTParams:
+    __slots__ = ('strength',)
+    strength: float
+
+
+@dataclass(frozen=True)
+class DWTParams:
+    __slots__ = ('strength', 'wavelet')
+    strength: float
+    wavelet: str
+
+
+@dataclass(frozen=True)
+class AudioParams:
+    __slots__ = ('bits_per_sample',)
+    bits_per_sample: int
+
+
+@dataclass(frozen=True)
+class VideoParams:
+    __slots__ = ('bits_per_channel', 'frame_skip')
+    bits_per_channel: int
+    frame_skip: int
+
+
+@dataclass(frozen=True)
+class Profile:
+    __slots__ = ('name', 'description', 'lsb', 'dct', 'dwt', 'audio', 'video')
+    name: str
+    description: str
+    lsb: LSBParams
+    dct: DCTParams
+    dwt: DWTParams
+    audio: AudioParams
+    video: VideoParams
+
+
+AlgorithmParams = Union[LSBParams, DCTParams, DWTParams, AudioParams, VideoParams]
+
+ALGORITHMS = ('lsb', 'dct', 'dwt', 'audio', 'video')
+
+ALGORITHM_PROFILES = MappingProxyType({
+    'stealth': Profile(
+        name='Maximum Stealth',
+        description='Minimal detectability, lower capacity',
+        lsb=LSBParams(bits_per_channel=1),
+        dct=DCTParams(strength=5.0),
+        dwt=DWTParams(strength=0.05, wavelet='haar'),
+        audio=AudioParams(bits_per_sample=1),
+        video=VideoParams(bits_per_channel=1, frame_skip=2)
+    ),
+    'balanced': Profile(
+        name='Balanced',
+        description='Good balance between capacity and stealth',
+        lsb=LSBParams(bits_per_channel=2),
+        dct=DCTParams(strength=10.0),
+        dwt=DWTParams(strength=0.1, wavelet='haar'),
+        audio=AudioParams(bits_per_sample=2),
+        video=VideoParams(bits_per_channel=2, frame_skip=1)
+    ),
+    'capacity': Profile(
+        name='Maximum Capacity',
+        description='Higher capacity, more detectable',
+        lsb=LSBParams(bits_per_channel=4),
+        dct=DCTParams(strength=20.0),
+        dwt=DWTParams(strength=0.2, wavelet='db1'),
+        audio=AudioParams(bits_per_sample=4),
+        video=VideoParams(bits_per_channel=4, frame_skip=1)
+    )
+})
+
+
+SUPPORTED_IMAGE_FORMATS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.gif')
+SUPPORTED_AUDIO_FORMATS = ('.wav',)
+SUPPORTED_VIDEO_FORMATS = ('.mp4', '.avi', '.mov', '.mkv')
+
+_FORMAT_SUFFIXES = {
+    'image': SUPPORTED_IMAGE_FORMATS,
+    'audio': SUPPORTED_AUDIO_FORMATS,
+    'video': SUPPORTED_VIDEO_FORMATS,
 }
 
 
-SUPPORTED_IMAGE_FORMATS = ['.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.gif']
-SUPPORTED_AUDIO_FORMATS = ['.wav']
-SUPPORTED_VIDEO_FORMATS = ['.mp4', '.avi', '.mov', '.mkv']
+def _env_mb(name: str, default: str) -> int:
+    raw = os.getenv(name, default)
+    try:
+        return int(raw)
+    except ValueError:
+        raise RuntimeError(f"{name} must be an integer number of MB, got {raw!r}")
+
+
+MAX_FILE_SIZE_MB = _env_mb('MAX_FILE_SIZE_MB', '50')
+MAX_PAYLOAD_SIZE_MB = _env_mb('MAX_PAYLOAD_SIZE_MB', '10')
 
-MAX_FILE_SIZE_MB = int(os.getenv('MAX_FILE_SIZE_MB', '50'))
-MAX_PAYLOAD_SIZE_MB = int(os.getenv('MAX_PAYLOAD_SIZE_MB', '10'))
+MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+MAX_PAYLOAD_SIZE_BYTES = MAX_PAYLOAD_SIZE_MB * 1024 * 1024
 
 UPLOAD_DIR = os.getenv('UPLOAD_DIR', 'uploads')
 OUTPUT_DIR = os.getenv('OUTPUT_DIR', 'outputs')
@@ -46,30 +117,23 @@ OUTPUT_DIR = os.getenv('OUTPUT_DIR', 'outputs')
 GROK_API_KEY = os.getenv('GROK_API_KEY', '')
 
 
-def get_profile(profile_name: str) -> Dict[str, Any]:
+@lru_cache(maxsize=None)
+def get_profile(profile_name: str) -> Profile:
     if profile_name not in ALGORITHM_PROFILES:
         raise ValueError(f"Unknown profile: {profile_name}. Available: {', '.join(ALGORITHM_PROFILES.keys())}")
     
     return ALGORITHM_PROFILES[profile_name]
 
 
-def get_algorithm_params(profile_name: str, algorithm: str) -> Dict[str, Any]:
+@lru_cache(maxsize=None)
+def get_algorithm_params(profile_name: str, algorithm: str) -> AlgorithmParams:
     profile = get_profile(profile_name)
     
-    if algorithm not in profile:
+    if algorithm not in ALGORITHMS:
         raise ValueError(f"Algorithm {algorithm} not found in profile {profile_name}")
     
-    return profile[algorithm]
+    return getattr(profile, algorithm)
 
 
 def is_supported_format(filename: str, file_type: str) -> bool:
-    ext = os.path.splitext(filename)[1].lower()
-    
-    if file_type == 'image':
-        return ext in SUPPORTED_IMAGE_FORMATS
-    elif file_type == 'audio':
-        return ext in SUPPORTED_AUDIO_FORMATS
-    elif file_type == 'video':
-        return ext in SUPPORTED_VIDEO_FORMATS
-    
-    return False
+    return filename.lower().endswith(_FORMAT_SUFFIXES.get(file_type, ()))
@@ -1,10 +1,36 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import time
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict
 
 
-class ColoredFormatter(logging.Formatter):
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that renders the timestamp once per second instead of once per record."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._time_cache = (None, '')
+    
+    def formatTime(self, record, datefmt=None):
+        datefmt = datefmt or self.datefmt
+        if not datefmt or '%f' in datefmt:
+            return super().formatTime(record, datefmt)
+        
+        second = int(record.created)
+        cached_second, cached_text = self._time_cache
+        if second != cached_second:
+            cached_text = time.strftime(datefmt, self.converter(second))
+            self._time_cache = (second, cached_text)
+        return cached_text
+
+
+class ColoredFormatter(CachedTimeFormatter):
     COLORS = {
         'DEBUG': '\033[36m',
         'INFO': '\033[32m',
@@ -14,28 +40,54 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = '\033[0m'
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._colored_levels = {
+            level: f"{color}{level}{self.RESET}" for level, color in self.COLORS.items()
+        }
+    
     def format(self, record):
-        log_color = self.COLORS.get(record.levelname, self.RESET)
-        record.levelname = f"{log_color}{record.levelname}{self.RESET}"
-        return super().format(record)
+        # Records are shared between handlers, so restore the plain level name afterwards
+        levelname = record.levelname
+        record.levelname = self._colored_levels.get(levelname, levelname)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
 
 
-def setup_logger(name: str = "stegano", log_file: str = None, level: int = logging.INFO) -> logging.Logger:
+@lru_cache(maxsize=32)
+def setup_logger(
+    name: str = "stegano",
+    log_file: str = None,
+    level: int = logging.INFO,
+    use_queue: bool = False
+) -> logging.Logger:
+    """
+    Configure a named logger with console (and optional file) output.
+    
+    With use_queue, records go through a QueueHandler and are written by a
+    QueueListener thread, so callers on an event loop never block on stream or file I/O.
+    """
     logger = logging.getLogger(name)
     logger.setLevel(level)
     
     if logger.handlers:
         return logger
     
+    handlers = []
+    
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(level)
     
-    console_formatter = ColoredFormatter(
+    # Only colorize when a terminal is attached; pipes and log collectors get plain text
+    formatter_class = ColoredFormatter if sys.stdout.isatty() else CachedTimeFormatter
+    console_formatter = formatter_class(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
     
     if log_file:
         log_dir = Path(log_file).parent
@@ -44,15 +96,32 @@ def setup_logger(name: str = "stegano", log_file: str = None, level: int = loggi
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(level)
         
-        file_formatter = logging.Formatter(
+        file_formatter = CachedTimeFormatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    if use_queue:
+        record_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(record_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        handlers = [logging.handlers.QueueHandler(record_queue)]
+    
+    for handler in handlers:
+        logger.addHandler(handler)
     
     return logger
 
 
+_LOGGERS: Dict[str, logging.Logger] = {}
+
+
 def get_logger(name: str = "stegano") -> logging.Logger:
-    return logging.getLogger(name)
+    # Skip logging's module lock and hierarchy walk on repeat lookups
+    logger = _LOGGERS.get(name)
+    if logger is None:
+        logger = _LOGGERS[name] = logging.getLogger(name)
+    return logger
@@ -1,12 +1,27 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from typing import Optional
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Literal, Optional, Tuple
+from collections import OrderedDict
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import base64
+import codecs
+import functools
+import hashlib
+import multiprocessing
+import orjson
 import os
-import shutil
-import uuid
+import secrets
+import sys
+import tempfile
+from anyio.to_thread import current_default_thread_limiter
 from dotenv import load_dotenv
 
+from logger import setup_logger
+
 from stego.analyzer import analyze_image
 from stego.ai_adapter import get_grok_recommendation
 from stego.lsb_encoder import encode_lsb
@@ -20,14 +35,17 @@ from stego.dct_decoder import decode_dct
 from stego.dwt_encoder import encode_dwt
 from stego.dwt_decoder import decode_dwt
 from stego.crypto import encrypt_payload, decrypt_payload
+from stego.metadata import pack_header, parse_header
 from stego.metrics import calculate_metrics, calculate_audio_metrics, calculate_video_metrics
 from stego.ai_explainer import get_explainer
-from stego.ai_steganalysis import get_detector
+from stego.ai_steganalysis import get_detector, run_steganalysis_tests
 from stego.ai_report_generator import get_report_generator
 
 load_dotenv()
 
-app = FastAPI(title="SteganoGen API", version="1.0.0")
+logger = setup_logger("stegano.api", use_queue=True)
+
+app = FastAPI(title="SteganoGen API", version="1.0.0", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -42,6 +60,338 @@ OUTPUT_DIR = "outputs"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+IMAGE_EXTS = frozenset({'.png', '.jpg', '.jpeg', '.bmp', '.tiff'})
+IMAGE_CARRIER_EXTS = IMAGE_EXTS | {'.gif'}
+AUDIO_EXTS = frozenset({'.wav'})
+VIDEO_EXTS = frozenset({'.mp4', '.avi', '.mov', '.mkv'})
+
+# Magic numbers for PNG, JPEG, BMP and little/big-endian TIFF (plus GIF for carriers)
+IMAGE_SIGNATURES = (b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff', b'BM', b'II*\x00', b'MM\x00*')
+IMAGE_CARRIER_SIGNATURES = IMAGE_SIGNATURES + (b'GIF87a', b'GIF89a')
+
+# Worker threads for blocking calls; Grok requests can hold one for up to 30 s, so the
+# defaults (40 for run_in_threadpool, cpu_count + 4 for the loop executor) run out early
+THREADPOOL_SIZE = 64
+
+RECOMMENDATION_GOALS = frozenset({'max_invisibility', 'max_capacity', 'balanced'})
+
+WaveletName = Literal['haar', 'db1', 'db2', 'db4', 'sym2', 'sym4', 'coif1']
+
+MEDIA_TYPES = MappingProxyType({
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.bmp': 'image/bmp',
+    '.tiff': 'image/tiff',
+    '.wav': 'audio/wav',
+    '.mp4': 'video/mp4',
+    '.avi': 'video/x-msvideo',
+    '.mov': 'video/quicktime',
+    '.mkv': 'video/x-matroska',
+    '.pdf': 'application/pdf'
+})
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class OutputFileResponse(FileResponse):
+    # Starlette reads files in 64 KiB chunks, one threadpool hop and one ASGI
+    # send per chunk. Stego videos run to hundreds of MB, so use larger chunks.
+    chunk_size = 1024 * 1024
+
+
+async def stage_upload(upload: UploadFile, suffix: str = "", **limits) -> Tuple[str, int]:
+    """
+    Stream an upload into a fresh temporary file in UPLOAD_DIR.
+    
+    Returns (path, size). The name comes from tempfile rather than the client
+    filename; the caller hands the path to discard_upload when done.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=UPLOAD_DIR)
+    os.close(fd)
+    try:
+        return path, await save_upload(upload, path, **limits)
+    except BaseException:
+        discard_upload(path)
+        raise
+
+
+async def read_upload(
+    upload: UploadFile,
+    max_bytes: Optional[int] = None,
+    too_large_detail: str = "File too large"
+) -> bytes:
+    """Read an in-memory upload (such as a payload file) in chunks, enforcing the size limit as it arrives."""
+    chunks = []
+    total = 0
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if max_bytes is not None and total > max_bytes:
+            raise HTTPException(status_code=400, detail=too_large_detail)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@app.on_event("startup")
+def init_ai_services():
+    # Build the AI singletons before the first request instead of lazily inside one
+    app.state.explainer = get_explainer()
+    app.state.detector = get_detector()
+    app.state.report_generator = get_report_generator()
+
+
+@app.on_event("startup")
+async def size_thread_pools():
+    current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=THREADPOOL_SIZE, thread_name_prefix="io")
+    )
+
+
+@app.on_event("startup")
+async def warm_ai_clients():
+    await app.state.explainer.warmup()
+
+
+@app.on_event("startup")
+def start_cpu_pool():
+    # Workers start after the logging, grok and anyio threads are running; forking this
+    # process then could copy a held lock into a child, so they come from a clean server
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    app.state.cpu_pool = ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context(start_method)
+    )
+
+
+@app.on_event("shutdown")
+def stop_cpu_pool():
+    app.state.cpu_pool.shutdown()
+
+
+async def _cleanup_worker(queue: asyncio.Queue) -> None:
+    while True:
+        path = await queue.get()
+        try:
+            await run_in_threadpool(os.remove, path)
+        except OSError:
+            pass
+        finally:
+            queue.task_done()
+
+
+@app.on_event("shutdown")
+async def close_ai_client():
+    await app.state.explainer.aclose()
+
+
+@app.on_event("startup")
+async def start_cleanup_worker():
+    app.state.cleanup_queue = asyncio.Queue()
+    app.state.cleanup_task = asyncio.create_task(_cleanup_worker(app.state.cleanup_queue))
+
+
+@app.on_event("shutdown")
+async def stop_cleanup_worker():
+    app.state.cleanup_task.cancel()
+    queue = app.state.cleanup_queue
+    while not queue.empty():
+        try:
+            os.remove(queue.get_nowait())
+        except OSError:
+            pass
+
+
+def discard_upload(path: str) -> None:
+    """Queue a temporary upload for deletion off the request path."""
+    app.state.cleanup_queue.put_nowait(path)
+
+
+async def run_cpu_bound(func, *args, **kwargs):
+    """
+    Run a CPU-heavy stego or metrics call in the shared process pool.
+    
+    Keeps the event loop free and lets concurrent requests use separate cores.
+    Arguments are pickled, so pass file paths and bytes rather than arrays.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.cpu_pool, functools.partial(func, *args, **kwargs))
+
+
+IMAGE_METRICS_UNAVAILABLE = {"psnr": 0, "ssim": 0, "mse": 0}
+
+# algorithm -> (encoder, metrics function, output suffix, metrics label, metrics on failure)
+ENCODERS = {
+    'lsb': (encode_lsb, calculate_metrics, '.png', "Metrics", IMAGE_METRICS_UNAVAILABLE),
+    'audio': (
+        encode_audio_lsb, calculate_audio_metrics, '.wav', "Audio metrics",
+        {"snr": 0, "quality": "Unknown", "description": "Metrics unavailable"}
+    ),
+    'video': (
+        encode_video_lsb, functools.partial(calculate_video_metrics, max_frames=50), '.avi', "Video metrics",
+        {"psnr": 0, "quality": "Unknown", "description": "Metrics unavailable"}
+    ),
+    'dct': (encode_dct, calculate_metrics, '.png', "Metrics", IMAGE_METRICS_UNAVAILABLE),
+    'dwt': (encode_dwt, calculate_metrics, '.png', "Metrics", IMAGE_METRICS_UNAVAILABLE),
+}
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(functools.partial(f.read, UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def run_encoder(
+    algorithm: str,
+    carrier_path: str,
+    full_payload: bytes,
+    file_id: str,
+    *params,
+    compute_metrics: bool = True,
+    carrier_hash: Optional[str] = None,
+    **options
+) -> dict:
+    """
+    Embed a framed payload with the registered encoder and build the encode response.
+    
+    params and options are passed to the encoder after (carrier, payload, output path).
+    With compute_metrics off, metrics are reported as skipped. When carrier_hash
+    is given, metrics are memoized by (carrier hash, output hash), so retrying an
+    identical encode does not recompute them.
+    """
+    encoder, metrics_fn, output_ext, metrics_label, metrics_unavailable = ENCODERS[algorithm]
+    
+    output_filename = f"{file_id}_stego{output_ext}"
+    output_path = os.path.join(OUTPUT_DIR, output_filename)
+    
+    try:
+        encode_result = await run_cpu_bound(encoder, carrier_path, full_payload, output_path, *params, **options)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    
+    if not compute_metrics:
+        metrics = dict.fromkeys(metrics_unavailable, None)
+        metrics["skipped"] = True
+    else:
+        metrics_key = None
+        metrics = None
+        if carrier_hash:
+            metrics_key = (algorithm, carrier_hash, await run_in_threadpool(_file_digest, output_path))
+            metrics = _cache_get(_metrics_cache, metrics_key)
+        
+        if metrics is None:
+            try:
+                metrics = await run_cpu_bound(metrics_fn, carrier_path, output_path)
+                if metrics_key:
+                    _cache_put(_metrics_cache, metrics_key, metrics)
+            except Exception as me:
+                logger.warning("%s calculation failed: %s", metrics_label, me)
+                metrics = dict(metrics_unavailable)
+        else:
+            metrics = dict(metrics)
+    
+    return {
+        "success": True,
+        "file_id": file_id,
+        "output_filename": output_filename,
+        "download_url": f"/api/download/{output_filename}",
+        "encode_info": encode_result,
+        "metrics": metrics
+    }
+
+
+def _write_all(raw, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[raw.write(view):]
+
+
+async def save_upload(
+    upload: UploadFile,
+    path: str,
+    max_bytes: Optional[int] = None,
+    too_large_detail: str = "File too large",
+    hasher=None,
+    signatures: Optional[Tuple[bytes, ...]] = None
+) -> int:
+    """
+    Stream an upload to disk in fixed-size chunks and return the number of bytes written.
+    
+    The size limit is enforced as chunks arrive, so oversize uploads are rejected
+    without ever holding the whole file in memory. If a hashlib object is given
+    as hasher, it is fed each chunk as it is written. If signatures is given, the
+    first chunk must start with one of those magic numbers, whatever the filename says.
+    """
+    total = 0
+    # Chunks are already large, so write them straight through the raw file
+    # rather than staging each one in a BufferedWriter.
+    with open(path, "wb", buffering=0) as buffer:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if signatures is not None and total == 0 and not chunk.startswith(signatures):
+                raise HTTPException(status_code=400, detail="File content does not match a supported format")
+            total += len(chunk)
+            if max_bytes is not None and total > max_bytes:
+                raise HTTPException(status_code=400, detail=too_large_detail)
+            if hasher is not None:
+                hasher.update(chunk)
+            await run_in_threadpool(_write_all, buffer, chunk)
+    return total
+
+
+TEXT_PROBE_SIZE = 4096
+
+
+async def decode_payload_text(payload_bytes: bytes) -> Optional[str]:
+    """
+    Decode an extracted payload as UTF-8, or return None if it is binary.
+    
+    Large payloads have their head checked first so binary data is rejected
+    without walking the whole buffer; the full decode then runs in the threadpool.
+    """
+    try:
+        if len(payload_bytes) <= TEXT_PROBE_SIZE:
+            return payload_bytes.decode('utf-8')
+        
+        # Incremental decoder tolerates a multi-byte sequence cut off by the probe window
+        codecs.getincrementaldecoder('utf-8')().decode(payload_bytes[:TEXT_PROBE_SIZE], final=False)
+        return await run_in_threadpool(payload_bytes.decode, 'utf-8')
+    except UnicodeDecodeError:
+        return None
+
+
+ANALYSIS_CACHE_SIZE = 128
+
+# Keyed by carrier content hash, so re-analyzing the same image (e.g. after
+# changing goal or payload) skips image statistics; the AI adapter caches the
+# Grok recommendation itself.
+_image_stats_cache = OrderedDict()
+
+# Encode quality metrics, keyed by (algorithm, carrier hash, stego output hash)
+_metrics_cache = OrderedDict()
+
+
+def _cache_get(cache: OrderedDict, key):
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _cache_put(cache: OrderedDict, key, value) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > ANALYSIS_CACHE_SIZE:
+        cache.popitem(last=False)
+
 
 @app.get("/")
 def root():
@@ -60,27 +410,40 @@ async def analyze(
             raise HTTPException(status_code=400, detail="No carrier image provided")
         
         file_ext = os.path.splitext(carrier.filename)[1].lower()
-        if file_ext not in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.gif']:
+        if file_ext not in IMAGE_CARRIER_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported image format: {file_ext}. Supported: PNG, JPG, BMP, TIFF"
             )
         
-        if goal not in ["max_invisibility", "max_capacity", "balanced"]:
+        if goal not in RECOMMENDATION_GOALS:
             goal = "max_invisibility"
         
-        file_id = str(uuid.uuid4())
+        file_id = secrets.token_hex(8)
         carrier_path = os.path.join(UPLOAD_DIR, f"{file_id}_carrier_{carrier.filename}")
         
-        with open(carrier_path, "wb") as buffer:
-            content = await carrier.read()
-            if len(content) == 0:
-                raise HTTPException(status_code=400, detail="Empty file uploaded")
-            if len(content) > 50 * 1024 * 1024:
-                raise HTTPException(status_code=400, detail="Image too large. Maximum: 50MB")
-            buffer.write(content)
-        
-        image_stats = analyze_image(carrier_path)
+        carrier_digest = hashlib.blake2b(digest_size=16)
+        upload_size = await save_upload(
+            carrier, carrier_path,
+            max_bytes=50 * 1024 * 1024,
+            too_large_detail="Image too large. Maximum: 50MB",
+            hasher=carrier_digest,
+            signatures=IMAGE_CARRIER_SIGNATURES
+        )
+        if upload_size == 0:
+            raise HTTPException(status_code=400, detail="Empty file uploaded")
+        carrier_hash = carrier_digest.hexdigest()
+        
+        # Analysis carriers are kept on disk; identical uploads share one stored copy,
+        # so renaming over an existing copy just swaps in the same bytes
+        stored_path = os.path.join(UPLOAD_DIR, f"{carrier_hash}_carrier{file_ext}")
+        os.replace(carrier_path, stored_path)
+        carrier_path = stored_path
+        
+        image_stats = _cache_get(_image_stats_cache, carrier_hash)
+        if image_stats is None:
+            image_stats = analyze_image(carrier_path)
+            _cache_put(_image_stats_cache, carrier_hash, image_stats)
         
         payload_size = len(payload_text.encode('utf-8')) if payload_text else 100
         
@@ -90,7 +453,7 @@ async def analyze(
                 detail=f"Payload too large. Need {payload_size} bytes, image capacity: {image_stats.get('max_capacity_bytes', 0)} bytes at 1 bit/channel"
             )
         
-        recommendation = get_grok_recommendation(image_stats, payload_size, goal)
+        recommendation = await run_in_threadpool(get_grok_recommendation, image_stats, payload_size, goal)
         
         return {
             "success": True,
@@ -106,8 +469,7 @@ async def analyze(
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        import traceback
-        print(f"Analysis error: {traceback.format_exc()}")
+        logger.exception("Analysis error")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
@@ -117,7 +479,7 @@ async def encode(
     payload_text: Optional[str] = Form(None),
     payload_file: Optional[UploadFile] = File(None),
     encryption_key: Optional[str] = Form(None),
-    bits_per_channel: int = Form(1),
+    bits_per_channel: int = Form(1, ge=1, le=4),
     file_id: Optional[str] = Form(None)
 ):
     carrier_path = None
@@ -128,136 +490,96 @@ async def encode(
         if not payload_text and not payload_file:
             raise HTTPException(status_code=400, detail="Either payload_text or payload_file must be provided")
         
-        if bits_per_channel < 1 or bits_per_channel > 4:
-            raise HTTPException(
-                status_code=400,
-                detail=f"bits_per_channel must be between 1 and 4, got {bits_per_channel}"
-            )
-        
         file_ext = os.path.splitext(carrier.filename)[1].lower()
-        if file_ext not in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.gif']:
+        if file_ext not in IMAGE_CARRIER_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported image format: {file_ext}. Supported: PNG, JPG, BMP, TIFF"
             )
         
         if not file_id:
-            file_id = str(uuid.uuid4())
+            file_id = secrets.token_hex(8)
         
         carrier_path = os.path.join(UPLOAD_DIR, f"{file_id}_carrier_{carrier.filename}")
         
-        with open(carrier_path, "wb") as buffer:
-            content = await carrier.read()
-            if len(content) == 0:
-                raise HTTPException(status_code=400, detail="Empty file uploaded")
-            if len(content) > 50 * 1024 * 1024:
-                raise HTTPException(status_code=400, detail="Image too large. Maximum: 50MB")
-            buffer.write(content)
+        upload_size = await save_upload(
+            carrier, carrier_path,
+            max_bytes=50 * 1024 * 1024,
+            too_large_detail="Image too large. Maximum: 50MB",
+            signatures=IMAGE_CARRIER_SIGNATURES
+        )
+        if upload_size == 0:
+            raise HTTPException(status_code=400, detail="Empty file uploaded")
         
         if payload_file:
-            payload_bytes = await payload_file.read()
+            payload_bytes = await read_upload(
+                payload_file,
+                max_bytes=10 * 1024 * 1024,
+                too_large_detail="Payload file too large. Maximum: 10MB"
+            )
             if len(payload_bytes) == 0:
                 raise HTTPException(status_code=400, detail="Empty payload file")
-            if len(payload_bytes) > 10 * 1024 * 1024:
-                raise HTTPException(status_code=400, detail="Payload file too large. Maximum: 10MB")
         else:
             if len(payload_text) > 10 * 1024 * 1024:
                 raise HTTPException(status_code=400, detail="Payload text too large. Maximum: 10MB")
             payload_bytes = payload_text.encode('utf-8')
         
-        metadata = {}
+        iv = None
         if encryption_key:
             try:
                 encrypted = encrypt_payload(payload_bytes, encryption_key)
                 payload_bytes = encrypted['encrypted_data']
-                metadata['iv'] = encrypted['iv'].hex()
-                metadata['encrypted'] = True
+                iv = encrypted['iv']
             except ValueError as ve:
                 raise HTTPException(status_code=400, detail=f"Encryption failed: {str(ve)}")
-        else:
-            metadata['encrypted'] = False
-        
-        metadata_str = f"STEGANO|{metadata['encrypted']}|{metadata.get('iv', '')}|"
-        full_payload = metadata_str.encode('utf-8') + payload_bytes
-        
-        output_filename = f"{file_id}_stego.png"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
         
-        try:
-            encode_result = encode_lsb(carrier_path, full_payload, output_path, bits_per_channel)
-        except ValueError as ve:
-            raise HTTPException(status_code=400, detail=str(ve))
+        metadata = pack_header(iv)
         
-        try:
-            metrics = calculate_metrics(carrier_path, output_path)
-        except Exception as me:
-            print(f"Warning: Metrics calculation failed: {me}")
-            metrics = {"psnr": 0, "ssim": 0, "mse": 0}
+        full_payload = metadata + payload_bytes
         
-        return {
-            "success": True,
-            "file_id": file_id,
-            "output_filename": output_filename,
-            "download_url": f"/api/download/{output_filename}",
-            "encode_info": encode_result,
-            "metrics": metrics
-        }
+        return await run_encoder('lsb', carrier_path, full_payload, file_id, bits_per_channel)
     
     except HTTPException:
         raise
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        import traceback
-        print(f"Encoding error: {traceback.format_exc()}")
+        logger.exception("Encoding error")
         raise HTTPException(status_code=500, detail=f"Encoding failed: {str(e)}")
     finally:
-        if carrier_path and os.path.exists(carrier_path) and not file_id:
-            try:
-                os.remove(carrier_path)
-            except:
-                pass
+        if carrier_path and not file_id:
+            discard_upload(carrier_path)
 
 
 @app.post("/api/decode")
 async def decode(
     stego_image: UploadFile = File(...),
     decryption_key: Optional[str] = Form(None),
-    bits_per_channel: int = Form(1)
+    bits_per_channel: int = Form(1, ge=1, le=4)
 ):
     stego_path = None
     try:
-        if bits_per_channel < 1 or bits_per_channel > 4:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"bits_per_channel must be between 1 and 4, got {bits_per_channel}"
-            )
-        
         if not stego_image.filename:
             raise HTTPException(status_code=400, detail="No file provided")
         
         file_ext = os.path.splitext(stego_image.filename)[1].lower()
-        if file_ext not in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']:
+        if file_ext not in IMAGE_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported file format: {file_ext}. Use PNG for best results."
             )
         
-        file_id = str(uuid.uuid4())
+        file_id = secrets.token_hex(8)
         stego_path = os.path.join(UPLOAD_DIR, f"{file_id}_stego_{stego_image.filename}")
         
-        with open(stego_path, "wb") as buffer:
-            shutil.copyfileobj(stego_image.file, buffer)
+        await save_upload(stego_image, stego_path, signatures=IMAGE_SIGNATURES)
         
-        extracted_bytes = decode_lsb(stego_path, bits_per_channel)
+        extracted_bytes = await run_cpu_bound(decode_lsb, stego_path, bits_per_channel)
         
-        is_encrypted = False
-        metadata_str = extracted_bytes.split(b'|', 3)
+        header = parse_header(extracted_bytes)
         
-        if len(metadata_str) >= 4 and metadata_str[0] == b'STEGANO':
-            is_encrypted = metadata_str[1] == b'True'
-            iv_hex = metadata_str[2].decode('utf-8')
-            payload_bytes = metadata_str[3]
+        if header:
+            is_encrypted, iv, body_offset = header
             
             if is_encrypted:
                 if not decryption_key:
@@ -267,23 +589,23 @@ async def decode(
                     )
                 
                 try:
-                    iv = bytes.fromhex(iv_hex)
-                    payload_bytes = decrypt_payload(payload_bytes, iv, decryption_key)
+                    payload_bytes = decrypt_payload(
+                        memoryview(extracted_bytes)[body_offset:], iv, decryption_key
+                    )
                 except ValueError as ve:
                     raise HTTPException(
                         status_code=400,
                         detail=f"Decryption failed: {str(ve)}"
                     )
+            else:
+                payload_bytes = extracted_bytes[body_offset:]
         else:
             payload_bytes = extracted_bytes
             is_encrypted = False
         
-        payload_text = None
-        is_binary = False
-        try:
-            payload_text = payload_bytes.decode('utf-8')
-        except UnicodeDecodeError:
-            is_binary = True
+        payload_text = await decode_payload_text(payload_bytes)
+        is_binary = payload_text is None
+        if is_binary:
             payload_text = f"Binary data ({len(payload_bytes)} bytes)"
         
         return {
@@ -292,7 +614,7 @@ async def decode(
             "payload_size": len(payload_bytes),
             "was_encrypted": is_encrypted,
             "is_binary": is_binary,
-            "payload_base64": payload_bytes.hex() if is_binary else None
+            "payload_base64": base64.b64encode(payload_bytes).decode('ascii') if is_binary else None
         }
     
     except HTTPException:
@@ -302,11 +624,8 @@ async def decode(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Decoding failed: {str(e)}")
     finally:
-        if stego_path and os.path.exists(stego_path):
-            try:
-                os.remove(stego_path)
-            except:
-                pass
+        if stego_path:
+            discard_upload(stego_path)
 
 
 @app.get("/api/download/{filename}")
@@ -317,21 +636,9 @@ async def download(filename: str):
         raise HTTPException(status_code=404, detail="File not found")
     
     file_ext = os.path.splitext(filename)[1].lower()
-    media_type_map = {
-        '.png': 'image/png',
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.bmp': 'image/bmp',
-        '.tiff': 'image/tiff',
-        '.wav': 'audio/wav',
-        '.mp4': 'video/mp4',
-        '.avi': 'video/x-msvideo',
-        '.mov': 'video/quicktime',
-        '.mkv': 'video/x-matroska'
-    }
-    media_type = media_type_map.get(file_ext, 'application/octet-stream')
+    media_type = MEDIA_TYPES.get(file_ext, 'application/octet-stream')
     
-    return FileResponse(
+    return OutputFileResponse(
         path=file_path,
         filename=filename,
         media_type=media_type
@@ -343,7 +650,7 @@ async def encode_audio(
     carrier: UploadFile = File(...),
     payload_text: str = Form(...),
     encryption_key: Optional[str] = Form(None),
-    bits_per_sample: int = Form(2)
+    bits_per_sample: int = Form(2, ge=1, le=4)
 ):
     carrier_path = None
     try:
@@ -354,122 +661,77 @@ async def encode_audio(
             raise HTTPException(status_code=400, detail="No payload text provided")
         
         file_ext = os.path.splitext(carrier.filename)[1].lower()
-        if file_ext not in ['.wav']:
+        if file_ext not in AUDIO_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported audio format: {file_ext}. Only WAV is supported."
             )
         
-        if bits_per_sample < 1 or bits_per_sample > 4:
-            raise HTTPException(
-                status_code=400,
-                detail=f"bits_per_sample must be between 1 and 4, got {bits_per_sample}"
-            )
-        
-        file_id = str(uuid.uuid4())
+        file_id = secrets.token_hex(8)
         carrier_path = os.path.join(UPLOAD_DIR, f"{file_id}_carrier_{carrier.filename}")
         
-        with open(carrier_path, "wb") as buffer:
-            content = await carrier.read()
-            if len(content) == 0:
-                raise HTTPException(status_code=400, detail="Empty file uploaded")
-            buffer.write(content)
+        upload_size = await save_upload(carrier, carrier_path)
+        if upload_size == 0:
+            raise HTTPException(status_code=400, detail="Empty file uploaded")
         
         payload_bytes = payload_text.encode('utf-8')
         
-        metadata = {}
+        iv = None
         if encryption_key:
             try:
                 encrypted = encrypt_payload(payload_bytes, encryption_key)
                 payload_bytes = encrypted['encrypted_data']
-                metadata['iv'] = encrypted['iv'].hex()
-                metadata['encrypted'] = True
+                iv = encrypted['iv']
             except ValueError as ve:
                 raise HTTPException(status_code=400, detail=f"Encryption failed: {str(ve)}")
-        else:
-            metadata['encrypted'] = False
         
-        metadata_str = f"STEGANO|{metadata['encrypted']}|{metadata.get('iv', '')}|"
-        full_payload = metadata_str.encode('utf-8') + payload_bytes
+        metadata = pack_header(iv)
         
-        output_filename = f"{file_id}_stego.wav"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
-        
-        try:
-            encode_result = encode_audio_lsb(carrier_path, full_payload, output_path, bits_per_sample)
-        except ValueError as ve:
-            raise HTTPException(status_code=400, detail=str(ve))
+        full_payload = metadata + payload_bytes
         
-        try:
-            metrics = calculate_audio_metrics(carrier_path, output_path)
-        except Exception as me:
-            print(f"Warning: Audio metrics calculation failed: {me}")
-            metrics = {"snr": 0, "quality": "Unknown", "description": "Metrics unavailable"}
-        
-        return {
-            "success": True,
-            "file_id": file_id,
-            "output_filename": output_filename,
-            "download_url": f"/api/download/{output_filename}",
-            "encode_info": encode_result,
-            "metrics": metrics
-        }
+        return await run_encoder('audio', carrier_path, full_payload, file_id, bits_per_sample)
     
     except HTTPException:
         raise
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        import traceback
-        print(f"Audio encoding error: {traceback.format_exc()}")
+        logger.exception("Audio encoding error")
         raise HTTPException(status_code=500, detail=f"Audio encoding failed: {str(e)}")
     finally:
-        if carrier_path and os.path.exists(carrier_path):
-            try:
-                os.remove(carrier_path)
-            except:
-                pass
+        if carrier_path:
+            discard_upload(carrier_path)
 
 
 @app.post("/api/decode/audio")
 async def decode_audio(
     stego_audio: UploadFile = File(...),
     decryption_key: Optional[str] = Form(None),
-    bits_per_sample: int = Form(2)
+    bits_per_sample: int = Form(2, ge=1, le=4)
 ):
     stego_path = None
     try:
-        if bits_per_sample < 1 or bits_per_sample > 4:
-            raise HTTPException(
-                status_code=400,
-                detail=f"bits_per_sample must be between 1 and 4, got {bits_per_sample}"
-            )
-        
         if not stego_audio.filename:
             raise HTTPException(status_code=400, detail="No file provided")
         
         file_ext = os.path.splitext(stego_audio.filename)[1].lower()
-        if file_ext not in ['.wav']:
+        if file_ext not in AUDIO_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported file format: {file_ext}. Only WAV is supported."
             )
         
-        file_id = str(uuid.uuid4())
+        file_id = secrets.token_hex(8)
         stego_path = os.path.join(UPLOAD_DIR, f"{file_id}_stego_{stego_audio.filename}")
         
-        with open(stego_path, "wb") as buffer:
-            shutil.copyfileobj(stego_audio.file, buffer)
+        await save_upload(stego_audio, stego_path)
         
-        extracted_bytes = decode_audio_lsb(stego_path, bits_per_sample)
+        extracted_bytes = await run_cpu_bound(decode_audio_lsb, stego_path, bits_per_sample)
         
-        is_encrypted = False
-        metadata_str = extracted_bytes.split(b'|', 3)
+        header = parse_header(extracted_bytes)
         
-        if len(metadata_str) >= 4 and metadata_str[0] == b'STEGANO':
-            is_encrypted = metadata_str[1] == b'True'
-            iv_hex = metadata_str[2].decode('utf-8')
-            payload_bytes = metadata_str[3]
+        if header:
+            is_encrypted, iv, body_offset = header
             
             if is_encrypted:
                 if not decryption_key:
@@ -479,20 +741,22 @@ async def decode_audio(
                     )
                 
                 try:
-                    iv = bytes.fromhex(iv_hex)
-                    payload_bytes = decrypt_payload(payload_bytes, iv, decryption_key)
+                    payload_bytes = decrypt_payload(
+                        memoryview(extracted_bytes)[body_offset:], iv, decryption_key
+                    )
                 except ValueError as ve:
                     raise HTTPException(
                         status_code=400,
                         detail=f"Decryption failed: {str(ve)}"
                     )
+            else:
+                payload_bytes = extracted_bytes[body_offset:]
         else:
             payload_bytes = extracted_bytes
             is_encrypted = False
         
-        try:
-            payload_text = payload_bytes.decode('utf-8')
-        except UnicodeDecodeError:
+        payload_text = await decode_payload_text(payload_bytes)
+        if payload_text is None:
             raise HTTPException(
                 status_code=400,
                 detail="Could not decode payload as text. Wrong parameters or corrupted data."
@@ -512,11 +776,8 @@ async def decode_audio(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Audio decoding failed: {str(e)}")
     finally:
-        if stego_path and os.path.exists(stego_path):
-            try:
-                os.remove(stego_path)
-            except:
-                pass
+        if stego_path:
+            discard_upload(stego_path)
 
 
 @app.post("/api/encode/video")
@@ -525,8 +786,8 @@ async def encode_video_endpoint(
     payload_text: Optional[str] = Form(None),
     payload_file: Optional[UploadFile] = File(None),
     encryption_key: Optional[str] = Form(None),
-    bits_per_channel: int = Form(1),
-    frame_skip: int = Form(1)
+    bits_per_channel: int = Form(1, ge=1, le=4),
+    frame_skip: int = Form(1, ge=1)
 ):
     carrier_path = None
     try:
@@ -537,106 +798,69 @@ async def encode_video_endpoint(
             raise HTTPException(status_code=400, detail="Either payload_text or payload_file must be provided")
         
         file_ext = os.path.splitext(carrier.filename)[1].lower()
-        if file_ext not in ['.mp4', '.avi', '.mov', '.mkv']:
+        if file_ext not in VIDEO_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported video format: {file_ext}. Supported: MP4, AVI, MOV, MKV"
             )
         
-        if bits_per_channel < 1 or bits_per_channel > 4:
-            raise HTTPException(
-                status_code=400,
-                detail=f"bits_per_channel must be between 1 and 4, got {bits_per_channel}"
-            )
-        
-        if frame_skip < 1:
-            raise HTTPException(status_code=400, detail="frame_skip must be at least 1")
-        
-        file_id = str(uuid.uuid4())
+        file_id = secrets.token_hex(8)
         carrier_path = os.path.join(UPLOAD_DIR, f"{file_id}_carrier_{carrier.filename}")
         
-        with open(carrier_path, "wb") as buffer:
-            content = await carrier.read()
-            if len(content) == 0:
-                raise HTTPException(status_code=400, detail="Empty file uploaded")
-            buffer.write(content)
+        upload_size = await save_upload(carrier, carrier_path)
+        if upload_size == 0:
+            raise HTTPException(status_code=400, detail="Empty file uploaded")
         
         # Handle text or binary file payload
         if payload_file:
-            payload_bytes = await payload_file.read()
+            payload_bytes = await read_upload(payload_file)
             if len(payload_bytes) == 0:
                 raise HTTPException(status_code=400, detail="Empty payload file")
         else:
             payload_bytes = payload_text.encode('utf-8')
         
-        metadata = {}
+        iv = None
         if encryption_key:
             try:
                 encrypted = encrypt_payload(payload_bytes, encryption_key)
                 payload_bytes = encrypted['encrypted_data']
-                metadata['iv'] = encrypted['iv'].hex()
-                metadata['encrypted'] = True
+                iv = encrypted['iv']
             except ValueError as ve:
                 raise HTTPException(status_code=400, detail=f"Encryption failed: {str(ve)}")
-        else:
-            metadata['encrypted'] = False
         
-        metadata_str = f"STEGANO|{metadata['encrypted']}|{metadata.get('iv', '')}|"
-        full_payload = metadata_str.encode('utf-8') + payload_bytes
+        metadata = pack_header(iv)
         
-        output_filename = f"{file_id}_stego.avi"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
+        full_payload = metadata + payload_bytes
         
-        try:
-            encode_result = encode_video_lsb(
-                carrier_path, 
-                full_payload, 
-                output_path, 
-                bits_per_channel, 
-                frame_skip,
-                use_uncompressed=True,  # Use lossless codec to preserve LSB data
-                store_params=True       # Store parameters in video header for auto-detection
-            )
-        except ValueError as ve:
-            raise HTTPException(status_code=400, detail=str(ve))
-        
-        try:
-            metrics = calculate_video_metrics(carrier_path, output_path, max_frames=50)
-        except Exception as me:
-            print(f"Warning: Video metrics calculation failed: {me}")
-            metrics = {"psnr": 0, "quality": "Unknown", "description": "Metrics unavailable"}
-        
-        return {
-            "success": True,
-            "file_id": file_id,
-            "output_filename": output_filename,
-            "download_url": f"/api/download/{output_filename}",
-            "encode_info": encode_result,
-            "metrics": metrics
-        }
+        return await run_encoder(
+            'video',
+            carrier_path,
+            full_payload,
+            file_id,
+            bits_per_channel,
+            frame_skip,
+            use_uncompressed=True,  # Use lossless codec to preserve LSB data
+            store_params=True       # Store parameters in video header for auto-detection
+        )
     
     except HTTPException:
         raise
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        import traceback
-        print(f"Video encoding error: {traceback.format_exc()}")
+        logger.exception("Video encoding error")
         raise HTTPException(status_code=500, detail=f"Video encoding failed: {str(e)}")
     finally:
-        if carrier_path and os.path.exists(carrier_path):
-            try:
-                os.remove(carrier_path)
-            except:
-                pass
+        if carrier_path:
+            discard_upload(carrier_path)
 
 
 @app.post("/api/decode/video")
 async def decode_video_endpoint(
     stego_video: UploadFile = File(...),
     decryption_key: Optional[str] = Form(None),
-    bits_per_channel: Optional[int] = Form(None),
-    frame_skip: Optional[int] = Form(None),
+    bits_per_channel: Optional[int] = Form(None, ge=1, le=4),
+    frame_skip: Optional[int] = Form(None, ge=1),
     auto_detect: bool = Form(True)
 ):
     """
@@ -647,42 +871,28 @@ async def decode_video_endpoint(
     """
     stego_path = None
     try:
-        # Validate provided parameters if given
-        if bits_per_channel is not None and (bits_per_channel < 1 or bits_per_channel > 4):
-            raise HTTPException(
-                status_code=400,
-                detail=f"bits_per_channel must be between 1 and 4, got {bits_per_channel}"
-            )
-        
-        if frame_skip is not None and frame_skip < 1:
-            raise HTTPException(status_code=400, detail="frame_skip must be at least 1")
-        
         if not stego_video.filename:
             raise HTTPException(status_code=400, detail="No file provided")
         
         file_ext = os.path.splitext(stego_video.filename)[1].lower()
-        if file_ext not in ['.mp4', '.avi', '.mov', '.mkv']:
+        if file_ext not in VIDEO_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported file format: {file_ext}. Supported: MP4, AVI, MOV, MKV"
             )
         
-        file_id = str(uuid.uuid4())
+        file_id = secrets.token_hex(8)
         stego_path = os.path.join(UPLOAD_DIR, f"{file_id}_stego_{stego_video.filename}")
         
-        with open(stego_path, "wb") as buffer:
-            shutil.copyfileobj(stego_video.file, buffer)
+        await save_upload(stego_video, stego_path)
         
         # Decode with auto-detection enabled by default
-        extracted_bytes = decode_video_lsb(stego_path, bits_per_channel, frame_skip, auto_detect)
+        extracted_bytes = await run_cpu_bound(decode_video_lsb, stego_path, bits_per_channel, frame_skip, auto_detect)
         
-        is_encrypted = False
-        metadata_str = extracted_bytes.split(b'|', 3)
+        header = parse_header(extracted_bytes)
         
-        if len(metadata_str) >= 4 and metadata_str[0] == b'STEGANO':
-            is_encrypted = metadata_str[1] == b'True'
-            iv_hex = metadata_str[2].decode('utf-8')
-            payload_bytes = metadata_str[3]
+        if header:
+            is_encrypted, iv, body_offset = header
             
             if is_encrypted:
                 if not decryption_key:
@@ -692,20 +902,22 @@ async def decode_video_endpoint(
                     )
                 
                 try:
-                    iv = bytes.fromhex(iv_hex)
-                    payload_bytes = decrypt_payload(payload_bytes, iv, decryption_key)
+                    payload_bytes = decrypt_payload(
+                        memoryview(extracted_bytes)[body_offset:], iv, decryption_key
+                    )
                 except ValueError as ve:
                     raise HTTPException(
                         status_code=400,
                         detail=f"Decryption failed: {str(ve)}"
                     )
+            else:
+                payload_bytes = extracted_bytes[body_offset:]
         else:
             payload_bytes = extracted_bytes
             is_encrypted = False
         
-        try:
-            payload_text = payload_bytes.decode('utf-8')
-        except UnicodeDecodeError:
+        payload_text = await decode_payload_text(payload_bytes)
+        if payload_text is None:
             raise HTTPException(
                 status_code=400,
                 detail="Could not decode payload as text. Wrong parameters or corrupted data."
@@ -725,11 +937,8 @@ async def decode_video_endpoint(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Video decoding failed: {str(e)}")
     finally:
-        if stego_path and os.path.exists(stego_path):
-            try:
-                os.remove(stego_path)
-            except:
-                pass
+        if stego_path:
+            discard_upload(stego_path)
 
 
 @app.post("/api/encode/dct")
@@ -737,7 +946,8 @@ async def encode_dct_endpoint(
     carrier: UploadFile = File(...),
     payload_text: str = Form(...),
     encryption_key: Optional[str] = Form(None),
-    strength: float = Form(15.0)
+    strength: float = Form(15.0, ge=1.0, le=100.0),
+    compute_metrics: bool = Form(True)
 ):
     carrier_path = None
     try:
@@ -748,122 +958,78 @@ async def encode_dct_endpoint(
             raise HTTPException(status_code=400, detail="No payload text provided")
         
         file_ext = os.path.splitext(carrier.filename)[1].lower()
-        if file_ext not in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']:
+        if file_ext not in IMAGE_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported image format: {file_ext}. Supported: PNG, JPG, BMP, TIFF"
             )
         
-        if strength < 1.0 or strength > 100.0:
-            raise HTTPException(
-                status_code=400,
-                detail=f"strength must be between 1.0 and 100.0, got {strength}"
-            )
-        
-        file_id = str(uuid.uuid4())
-        carrier_path = os.path.join(UPLOAD_DIR, f"{file_id}_carrier_{carrier.filename}")
-        
-        with open(carrier_path, "wb") as buffer:
-            content = await carrier.read()
-            if len(content) == 0:
-                raise HTTPException(status_code=400, detail="Empty file uploaded")
-            buffer.write(content)
+        file_id = secrets.token_hex(8)
+        carrier_digest = hashlib.blake2b(digest_size=16)
+        carrier_path, upload_size = await stage_upload(
+            carrier, file_ext, hasher=carrier_digest, signatures=IMAGE_SIGNATURES
+        )
+        if upload_size == 0:
+            raise HTTPException(status_code=400, detail="Empty file uploaded")
         
         payload_bytes = payload_text.encode('utf-8')
         
-        metadata = {}
+        iv = None
         if encryption_key:
             try:
                 encrypted = encrypt_payload(payload_bytes, encryption_key)
                 payload_bytes = encrypted['encrypted_data']
-                metadata['iv'] = encrypted['iv'].hex()
-                metadata['encrypted'] = True
+                iv = encrypted['iv']
             except ValueError as ve:
                 raise HTTPException(status_code=400, detail=f"Encryption failed: {str(ve)}")
-        else:
-            metadata['encrypted'] = False
-        
-        metadata_str = f"STEGANO|{metadata['encrypted']}|{metadata.get('iv', '')}|"
-        full_payload = metadata_str.encode('utf-8') + payload_bytes
         
-        output_filename = f"{file_id}_stego.png"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
+        metadata = pack_header(iv)
         
-        try:
-            encode_result = encode_dct(carrier_path, full_payload, output_path, strength)
-        except ValueError as ve:
-            raise HTTPException(status_code=400, detail=str(ve))
-        
-        try:
-            metrics = calculate_metrics(carrier_path, output_path)
-        except Exception as me:
-            print(f"Warning: Metrics calculation failed: {me}")
-            metrics = {"psnr": 0, "ssim": 0, "mse": 0}
+        full_payload = metadata + payload_bytes
         
-        return {
-            "success": True,
-            "file_id": file_id,
-            "output_filename": output_filename,
-            "download_url": f"/api/download/{output_filename}",
-            "encode_info": encode_result,
-            "metrics": metrics
-        }
+        return await run_encoder(
+            'dct', carrier_path, full_payload, file_id, strength,
+            compute_metrics=compute_metrics, carrier_hash=carrier_digest.hexdigest()
+        )
     
     except HTTPException:
         raise
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        import traceback
-        print(f"DCT encoding error: {traceback.format_exc()}")
+        logger.exception("DCT encoding error")
         raise HTTPException(status_code=500, detail=f"DCT encoding failed: {str(e)}")
     finally:
-        if carrier_path and os.path.exists(carrier_path):
-            try:
-                os.remove(carrier_path)
-            except:
-                pass
+        if carrier_path:
+            discard_upload(carrier_path)
 
 
 @app.post("/api/decode/dct")
 async def decode_dct_endpoint(
     stego_image: UploadFile = File(...),
     decryption_key: Optional[str] = Form(None),
-    strength: float = Form(15.0)
+    strength: float = Form(15.0, ge=1.0, le=100.0)
 ):
     stego_path = None
     try:
-        if strength < 1.0 or strength > 100.0:
-            raise HTTPException(
-                status_code=400,
-                detail=f"strength must be between 1.0 and 100.0, got {strength}"
-            )
-        
         if not stego_image.filename:
             raise HTTPException(status_code=400, detail="No file provided")
         
         file_ext = os.path.splitext(stego_image.filename)[1].lower()
-        if file_ext not in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']:
+        if file_ext not in IMAGE_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported file format: {file_ext}. Use PNG for best results."
             )
         
-        file_id = str(uuid.uuid4())
-        stego_path = os.path.join(UPLOAD_DIR, f"{file_id}_stego_{stego_image.filename}")
-        
-        with open(stego_path, "wb") as buffer:
-            shutil.copyfileobj(stego_image.file, buffer)
+        stego_path, _ = await stage_upload(stego_image, file_ext, signatures=IMAGE_SIGNATURES)
         
-        extracted_bytes = decode_dct(stego_path, strength)
+        extracted_bytes = await run_cpu_bound(decode_dct, stego_path, strength)
         
-        is_encrypted = False
-        metadata_str = extracted_bytes.split(b'|', 3)
+        header = parse_header(extracted_bytes)
         
-        if len(metadata_str) >= 4 and metadata_str[0] == b'STEGANO':
-            is_encrypted = metadata_str[1] == b'True'
-            iv_hex = metadata_str[2].decode('utf-8')
-            payload_bytes = metadata_str[3]
+        if header:
+            is_encrypted, iv, body_offset = header
             
             if is_encrypted:
                 if not decryption_key:
@@ -873,13 +1039,16 @@ async def decode_dct_endpoint(
                     )
                 
                 try:
-                    iv = bytes.fromhex(iv_hex)
-                    payload_bytes = decrypt_payload(payload_bytes, iv, decryption_key)
+                    payload_bytes = decrypt_payload(
+                        memoryview(extracted_bytes)[body_offset:], iv, decryption_key
+                    )
                 except ValueError as ve:
                     raise HTTPException(
                         status_code=400,
                         detail=f"Decryption failed: {str(ve)}"
                     )
+            else:
+                payload_bytes = extracted_bytes[body_offset:]
         else:
             payload_bytes = extracted_bytes
             is_encrypted = False
@@ -906,11 +1075,8 @@ async def decode_dct_endpoint(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DCT decoding failed: {str(e)}")
     finally:
-        if stego_path and os.path.exists(stego_path):
-            try:
-                os.remove(stego_path)
-            except:
-                pass
+        if stego_path:
+            discard_upload(stego_path)
 
 
 @app.post("/api/encode/dwt")
@@ -918,8 +1084,9 @@ async def encode_dwt_endpoint(
     carrier: UploadFile = File(...),
     payload_text: str = Form(...),
     encryption_key: Optional[str] = Form(None),
-    wavelet: str = Form("haar"),
-    strength: float = Form(0.1)
+    wavelet: WaveletName = Form("haar"),
+    strength: float = Form(0.1, ge=0.01, le=10.0),
+    compute_metrics: bool = Form(True)
 ):
     carrier_path = None
     try:
@@ -930,135 +1097,79 @@ async def encode_dwt_endpoint(
             raise HTTPException(status_code=400, detail="No payload text provided")
         
         file_ext = os.path.splitext(carrier.filename)[1].lower()
-        if file_ext not in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']:
+        if file_ext not in IMAGE_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported image format: {file_ext}. Supported: PNG, JPG, BMP, TIFF"
             )
         
-        if wavelet not in ['haar', 'db1', 'db2', 'db4', 'sym2', 'sym4', 'coif1']:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported wavelet: {wavelet}. Supported: haar, db1, db2, db4, sym2, sym4, coif1"
-            )
-        
-        if strength < 0.01 or strength > 10.0:
-            raise HTTPException(
-                status_code=400,
-                detail=f"strength must be between 0.01 and 10.0, got {strength}"
-            )
-        
-        file_id = str(uuid.uuid4())
-        carrier_path = os.path.join(UPLOAD_DIR, f"{file_id}_carrier_{carrier.filename}")
-        
-        with open(carrier_path, "wb") as buffer:
-            content = await carrier.read()
-            if len(content) == 0:
-                raise HTTPException(status_code=400, detail="Empty file uploaded")
-            buffer.write(content)
+        file_id = secrets.token_hex(8)
+        carrier_digest = hashlib.blake2b(digest_size=16)
+        carrier_path, upload_size = await stage_upload(
+            carrier, file_ext, hasher=carrier_digest, signatures=IMAGE_SIGNATURES
+        )
+        if upload_size == 0:
+            raise HTTPException(status_code=400, detail="Empty file uploaded")
         
         payload_bytes = payload_text.encode('utf-8')
         
-        metadata = {}
+        iv = None
         if encryption_key:
             try:
                 encrypted = encrypt_payload(payload_bytes, encryption_key)
                 payload_bytes = encrypted['encrypted_data']
-                metadata['iv'] = encrypted['iv'].hex()
-                metadata['encrypted'] = True
+                iv = encrypted['iv']
             except ValueError as ve:
                 raise HTTPException(status_code=400, detail=f"Encryption failed: {str(ve)}")
-        else:
-            metadata['encrypted'] = False
-        
-        metadata_str = f"STEGANO|{metadata['encrypted']}|{metadata.get('iv', '')}|"
-        full_payload = metadata_str.encode('utf-8') + payload_bytes
-        
-        output_filename = f"{file_id}_stego.png"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
         
-        try:
-            encode_result = encode_dwt(carrier_path, full_payload, output_path, wavelet, strength)
-        except ValueError as ve:
-            raise HTTPException(status_code=400, detail=str(ve))
+        metadata = pack_header(iv)
         
-        try:
-            metrics = calculate_metrics(carrier_path, output_path)
-        except Exception as me:
-            print(f"Warning: Metrics calculation failed: {me}")
-            metrics = {"psnr": 0, "ssim": 0, "mse": 0}
+        full_payload = metadata + payload_bytes
         
-        return {
-            "success": True,
-            "file_id": file_id,
-            "output_filename": output_filename,
-            "download_url": f"/api/download/{output_filename}",
-            "encode_info": encode_result,
-            "metrics": metrics
-        }
+        return await run_encoder(
+            'dwt', carrier_path, full_payload, file_id, wavelet, strength,
+            compute_metrics=compute_metrics, carrier_hash=carrier_digest.hexdigest()
+        )
     
     except HTTPException:
         raise
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        import traceback
-        print(f"DWT encoding error: {traceback.format_exc()}")
+        logger.exception("DWT encoding error")
         raise HTTPException(status_code=500, detail=f"DWT encoding failed: {str(e)}")
     finally:
-        if carrier_path and os.path.exists(carrier_path):
-            try:
-                os.remove(carrier_path)
-            except:
-                pass
+        if carrier_path:
+            discard_upload(carrier_path)
 
 
 @app.post("/api/decode/dwt")
 async def decode_dwt_endpoint(
     stego_image: UploadFile = File(...),
     decryption_key: Optional[str] = Form(None),
-    wavelet: str = Form("haar"),
-    strength: float = Form(0.1)
+    wavelet: WaveletName = Form("haar"),
+    strength: float = Form(0.1, ge=0.01, le=10.0)
 ):
     stego_path = None
     try:
-        if wavelet not in ['haar', 'db1', 'db2', 'db4', 'sym2', 'sym4', 'coif1']:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported wavelet: {wavelet}. Supported: haar, db1, db2, db4, sym2, sym4, coif1"
-            )
-        
-        if strength < 0.01 or strength > 10.0:
-            raise HTTPException(
-                status_code=400,
-                detail=f"strength must be between 0.01 and 10.0, got {strength}"
-            )
-        
         if not stego_image.filename:
             raise HTTPException(status_code=400, detail="No file provided")
         
         file_ext = os.path.splitext(stego_image.filename)[1].lower()
-        if file_ext not in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']:
+        if file_ext not in IMAGE_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported file format: {file_ext}. Use PNG for best results."
             )
         
-        file_id = str(uuid.uuid4())
-        stego_path = os.path.join(UPLOAD_DIR, f"{file_id}_stego_{stego_image.filename}")
+        stego_path, _ = await stage_upload(stego_image, file_ext, signatures=IMAGE_SIGNATURES)
         
-        with open(stego_path, "wb") as buffer:
-            shutil.copyfileobj(stego_image.file, buffer)
+        extracted_bytes = await run_cpu_bound(decode_dwt, stego_path, wavelet, strength)
         
-        extracted_bytes = decode_dwt(stego_path, wavelet, strength)
+        header = parse_header(extracted_bytes)
         
-        is_encrypted = False
-        metadata_str = extracted_bytes.split(b'|', 3)
-        
-        if len(metadata_str) >= 4 and metadata_str[0] == b'STEGANO':
-            is_encrypted = metadata_str[1] == b'True'
-            iv_hex = metadata_str[2].decode('utf-8')
-            payload_bytes = metadata_str[3]
+        if header:
+            is_encrypted, iv, body_offset = header
             
             if is_encrypted:
                 if not decryption_key:
@@ -1068,13 +1179,16 @@ async def decode_dwt_endpoint(
                     )
                 
                 try:
-                    iv = bytes.fromhex(iv_hex)
-                    payload_bytes = decrypt_payload(payload_bytes, iv, decryption_key)
+                    payload_bytes = decrypt_payload(
+                        memoryview(extracted_bytes)[body_offset:], iv, decryption_key
+                    )
                 except ValueError as ve:
                     raise HTTPException(
                         status_code=400,
                         detail=f"Decryption failed: {str(ve)}"
                     )
+            else:
+                payload_bytes = extracted_bytes[body_offset:]
         else:
             payload_bytes = extracted_bytes
             is_encrypted = False
@@ -1101,11 +1215,8 @@ async def decode_dwt_endpoint(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DWT decoding failed: {str(e)}")
     finally:
-        if stego_path and os.path.exists(stego_path):
-            try:
-                os.remove(stego_path)
-            except:
-                pass
+        if stego_path:
+            discard_upload(stego_path)
 
 
 # ===== NEW AI-POWERED ENDPOINTS =====
@@ -1119,18 +1230,17 @@ async def ai_chat(
     AI Chat Assistant - Answer questions about steganography
     """
     try:
-        explainer = get_explainer()
+        explainer = app.state.explainer
         
         # Parse context if provided
         context_dict = None
         if context:
             try:
-                import json
-                context_dict = json.loads(context)
+                context_dict = orjson.loads(context)
             except:
                 pass
         
-        response = explainer.chat_response(question, context_dict)
+        response = await explainer.achat_response(question, context_dict)
         
         return {
             "success": True,
@@ -1142,6 +1252,36 @@ async def ai_chat(
         raise HTTPException(status_code=500, detail=f"AI chat failed: {str(e)}")
 
 
+@app.post("/api/ai/chat/stream")
+async def ai_chat_stream(
+    question: str = Form(...),
+    context: Optional[str] = Form(None)
+):
+    """
+    AI Chat Assistant, streamed as Server-Sent Events while the answer is generated
+    """
+    explainer = app.state.explainer
+    
+    context_dict = None
+    if context:
+        try:
+            context_dict = orjson.loads(context)
+        except orjson.JSONDecodeError:
+            pass
+    
+    async def events():
+        async for delta in explainer.achat_response_stream(question, context_dict):
+            yield b"data: " + orjson.dumps({"delta": delta}) + b"\n\n"
+        yield b"data: [DONE]\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Stop reverse proxies and caches from holding events back until the answer is complete
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/api/ai/explain-algorithm")
 async def explain_algorithm(
     algorithm: str = Form(...),
@@ -1152,13 +1292,12 @@ async def explain_algorithm(
     Get AI explanation for why an algorithm was recommended
     """
     try:
-        import json
-        explainer = get_explainer()
+        explainer = app.state.explainer
         
-        stats = json.loads(image_stats)
-        rec = json.loads(recommendation)
+        stats = orjson.loads(image_stats)
+        rec = orjson.loads(recommendation)
         
-        explanation = explainer.explain_algorithm_choice(algorithm, stats, rec)
+        explanation = await explainer.aexplain_algorithm_choice(algorithm, stats, rec)
         
         return {
             "success": True,
@@ -1180,13 +1319,12 @@ async def security_analysis(
     Get detailed security risk analysis
     """
     try:
-        import json
-        explainer = get_explainer()
+        explainer = app.state.explainer
         
-        metrics_dict = json.loads(metrics)
-        settings_dict = json.loads(settings)
+        metrics_dict = orjson.loads(metrics)
+        settings_dict = orjson.loads(settings)
         
-        analysis = explainer.explain_security_risk(metrics_dict, algorithm, settings_dict)
+        analysis = await explainer.aexplain_security_risk(metrics_dict, algorithm, settings_dict)
         
         return {
             "success": True,
@@ -1206,9 +1344,9 @@ async def compare_algorithms(
     Compare two steganography algorithms
     """
     try:
-        explainer = get_explainer()
+        explainer = app.state.explainer
         
-        comparison = explainer.generate_comparison(algorithm1, algorithm2)
+        comparison = await explainer.agenerate_comparison(algorithm1, algorithm2)
         
         return {
             "success": True,
@@ -1221,6 +1359,38 @@ async def compare_algorithms(
         raise HTTPException(status_code=500, detail=f"Algorithm comparison failed: {str(e)}")
 
 
+@app.post("/api/ai/bundle")
+async def ai_bundle(
+    algorithm: str = Form(...),
+    image_stats: str = Form(...),
+    recommendation: str = Form(...),
+    metrics: str = Form(...),
+    settings: str = Form(...),
+    compare_with: Optional[str] = Form(None)
+):
+    """
+    Get the algorithm explanation, security analysis and optional comparison in one request
+    """
+    try:
+        explainer = app.state.explainer
+        
+        stats = orjson.loads(image_stats)
+        rec = orjson.loads(recommendation)
+        metrics_dict = orjson.loads(metrics)
+        settings_dict = orjson.loads(settings)
+        
+        bundle = await explainer.bundle(algorithm, stats, rec, metrics_dict, settings_dict, compare_with)
+        
+        return {
+            "success": True,
+            "algorithm": algorithm,
+            **bundle
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI bundle failed: {str(e)}")
+
+
 @app.post("/api/ai/steganalysis")
 async def steganalysis(
     image: UploadFile = File(...)
@@ -1234,27 +1404,25 @@ async def steganalysis(
             raise HTTPException(status_code=400, detail="No image provided")
         
         file_ext = os.path.splitext(image.filename)[1].lower()
-        if file_ext not in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']:
+        if file_ext not in IMAGE_EXTS:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported format: {file_ext}. Use PNG, JPG, BMP, or TIFF."
             )
         
         # Save temporary file
-        file_id = str(uuid.uuid4())
-        image_path = os.path.join(UPLOAD_DIR, f"{file_id}_analysis_{image.filename}")
-        
-        with open(image_path, "wb") as buffer:
-            content = await image.read()
-            if len(content) == 0:
-                raise HTTPException(status_code=400, detail="Empty file")
-            if len(content) > 50 * 1024 * 1024:
-                raise HTTPException(status_code=400, detail="Image too large. Max: 50MB")
-            buffer.write(content)
-        
-        # Run steganalysis
-        detector = get_detector()
-        results = detector.analyze_for_steganography(image_path)
+        image_path, upload_size = await stage_upload(
+            image, file_ext,
+            max_bytes=50 * 1024 * 1024,
+            too_large_detail="Image too large. Max: 50MB",
+            signatures=IMAGE_SIGNATURES
+        )
+        if upload_size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+        
+        # Run the statistical tests on a worker core, then the (network-bound) interpretation
+        test_results = await run_cpu_bound(run_steganalysis_tests, image_path)
+        results = await run_in_threadpool(app.state.detector.interpret_tests, test_results)
         
         return {
             "success": True,
@@ -1265,15 +1433,11 @@ async def steganalysis(
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        print(f"Steganalysis error: {traceback.format_exc()}")
+        logger.exception("Steganalysis error")
         raise HTTPException(status_code=500, detail=f"Steganalysis failed: {str(e)}")
     finally:
-        if image_path and os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-            except:
-                pass
+        if image_path:
+            discard_upload(image_path)
 
 
 @app.post("/api/ai/generate-report")
@@ -1284,19 +1448,17 @@ async def generate_report(
     Generate comprehensive PDF report for steganography operation
     """
     try:
-        import json
-        
         # Parse operation data
-        data = json.loads(operation_data)
+        data = orjson.loads(operation_data)
         
         # Generate unique filename
-        file_id = str(uuid.uuid4())
+        file_id = secrets.token_hex(8)
         report_filename = f"{file_id}_report.pdf"
         report_path = os.path.join(OUTPUT_DIR, report_filename)
         
         # Generate report
-        generator = get_report_generator()
-        generator.generate_encode_report(data, report_path, include_images=False)
+        generator = app.state.report_generator
+        await run_in_threadpool(generator.generate_encode_report, data, report_path, include_images=False)
         
         return {
             "success": True,
@@ -1305,8 +1467,7 @@ async def generate_report(
         }
     
     except Exception as e:
-        import traceback
-        print(f"Report generation error: {traceback.format_exc()}")
+        logger.exception("Report generation error")
         raise HTTPException(status_code=500, detail=f"Report generation failed: {str(e)}")
 
 
@@ -1317,4 +1478,13 @@ def health():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvicorn[standard] ships uvloop and httptools; request them by name so a broken
+    # install fails at startup instead of silently falling back to asyncio and h11.
+    # uvloop has no Windows build.
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
+    )
@@ -1,47 +1,53 @@
 import requests
-import json
+import orjson
 import os
+import re
+import threading
 import time
+from collections import OrderedDict
 from typing import Dict, Optional
 
 
-def get_grok_recommendation(image_stats: dict, payload_size: int, goal: str = "max_invisibility") -> dict:
-    api_key = os.getenv("GROK_API_KEY")
-    
-    if not api_key or api_key.strip() == "":
-        print("Info: No Grok API key found. Using fallback algorithm-based recommendation.")
-        return get_fallback_recommendation(image_stats, payload_size)
-    
-    suitability_info = image_stats.get('suitability', 'Unknown')
-    capacity_1bit = image_stats.get('capacity_at_1bit', image_stats.get('max_capacity_bytes', 0))
-    capacity_2bit = image_stats.get('capacity_at_2bit', capacity_1bit * 2)
-    capacity_4bit = image_stats.get('capacity_at_4bit', capacity_1bit * 4)
-    
-    capacity_ratio_1bit = (payload_size / capacity_1bit * 100) if capacity_1bit > 0 else 0
-    capacity_ratio_2bit = (payload_size / capacity_2bit * 100) if capacity_2bit > 0 else 0
-    
-    prompt = f"""You are an expert in steganography and image analysis. Analyze the following image statistics and recommend the optimal LSB embedding parameters.
+# Shared session so repeat recommendations reuse the pooled keep-alive TLS connection
+_session = requests.Session()
+
+# First ```json / ``` markdown fence in the model's reply, even with prose around it or no closing fence
+_FENCE = re.compile(r'```(?:json)?\s*(.*?)\s*(?:```|$)', re.DOTALL | re.IGNORECASE)
+
+
+def _strip_fences(text: str) -> str:
+    match = _FENCE.search(text)
+    return match.group(1) if match else text.strip()
+
+
+RECOMMENDATION_CACHE_SIZE = 256
+_recommendation_cache = OrderedDict()
+_recommendation_cache_lock = threading.Lock()
+
+
+# Static recommendation prompt; filled with %-formatting so no template is rebuilt per call
+_RECOMMENDATION_PROMPT = """You are an expert in steganography and image analysis. Analyze the following image statistics and recommend the optimal LSB embedding parameters.
 
 IMAGE ANALYSIS:
-- Dimensions: {image_stats['width']}x{image_stats['height']} pixels
-- Format: {image_stats['format']}
-- Total Pixels: {image_stats.get('total_pixels', 'N/A')}
+- Dimensions: %(width)sx%(height)s pixels
+- Format: %(format)s
+- Total Pixels: %(total_pixels)s
 
 QUALITY METRICS:
-- Entropy: {image_stats['entropy']} bits (higher = more random/complex)
-- Variance: {image_stats['variance']} (pixel variation level)
-- Edge Density: {image_stats['edge_density']} (texture richness)
-- Texture Score: {image_stats['texture_score']} (combined complexity)
-- Noise Level: {image_stats['noise_level']}
-- Suitability: {suitability_info}
+- Entropy: %(entropy)s bits (higher = more random/complex)
+- Variance: %(variance)s (pixel variation level)
+- Edge Density: %(edge_density)s (texture richness)
+- Texture Score: %(texture_score)s (combined complexity)
+- Noise Level: %(noise_level)s
+- Suitability: %(suitability)s
 
 CAPACITY ANALYSIS:
-- Payload Size: {payload_size} bytes ({payload_size / 1024:.2f} KB)
-- Capacity at 1 bit/channel: {capacity_1bit} bytes ({capacity_ratio_1bit:.1f}% used)
-- Capacity at 2 bits/channel: {capacity_2bit} bytes ({capacity_ratio_2bit:.1f}% used)
-- Capacity at 4 bits/channel: {capacity_4bit} bytes
+- Payload Size: %(payload_size)s bytes (%(payload_kb).2f KB)
+- Capacity at 1 bit/channel: %(capacity_1bit)s bytes (%(capacity_ratio_1bit).1f%% used)
+- Capacity at 2 bits/channel: %(capacity_2bit)s bytes (%(capacity_ratio_2bit).1f%% used)
+- Capacity at 4 bits/channel: %(capacity_4bit)s bytes
 
-USER GOAL: {goal}
+USER GOAL: %(goal)s
 
 Based on this analysis, recommend the optimal embedding strategy. Consider:
 1. Higher bits_per_channel = more capacity but more detectable
@@ -50,19 +56,121 @@ Based on this analysis, recommend the optimal embedding strategy. Consider:
 4. Balance capacity needs with detection risk
 
 Respond with ONLY valid JSON (no markdown, no extra text):
-{{
+{
   "algorithm": "LSB",
   "bits_per_channel": 1,
   "region_hint": "description of where to embed",
   "explanation": "detailed reasoning for this recommendation",
   "confidence": 0.85,
   "detection_risk": "low/medium/high"
-}}"""
+}"""
+
+
+_RECOMMENDATION_DEFAULTS = {
+    'algorithm': 'LSB',
+    'bits_per_channel': 1,
+    'region_hint': 'distributed embedding',
+    'explanation': 'AI-generated recommendation',
+    'confidence': 0.8,
+    'detection_risk': 'unknown'
+}
+
+
+def _clamp(value, cast, default, low, high):
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        value = default
+    return min(max(value, low), high)
+
+
+def _validate_recommendation(data) -> Optional[dict]:
+    """Project a decoded Grok reply onto the recommendation schema, or None if it is not an object."""
+    if not isinstance(data, dict):
+        print("Warning: AI response is not a JSON object")
+        return None
+    
+    recommendation = {key: data.get(key, default) for key, default in _RECOMMENDATION_DEFAULTS.items()}
+    recommendation['bits_per_channel'] = _clamp(recommendation['bits_per_channel'], int, 1, 1, 4)
+    recommendation['confidence'] = _clamp(recommendation['confidence'], float, 0.8, 0.0, 1.0)
+    recommendation['source'] = 'grok'
+    return recommendation
+
+
+def _recommendation_key(image_stats: dict, payload_size: int, goal: str) -> tuple:
+    # Near-identical carriers and payloads within the same KB share a recommendation
+    return (
+        round(image_stats.get('entropy', 0), 2),
+        round(image_stats.get('variance', 0)),
+        round(image_stats.get('edge_density', 0), 3),
+        round(image_stats.get('texture_score', 0), 1),
+        image_stats.get('width'),
+        image_stats.get('height'),
+        payload_size // 1024,
+        goal
+    )
+
+
+def get_grok_recommendation(image_stats: dict, payload_size: int, goal: str = "max_invisibility") -> dict:
+    api_key = os.getenv("GROK_API_KEY")
+    
+    if not api_key or api_key.strip() == "":
+        print("Info: No Grok API key found. Using fallback algorithm-based recommendation.")
+        return get_fallback_recommendation(image_stats, payload_size)
+    
+    cache_key = _recommendation_key(image_stats, payload_size, goal)
+    with _recommendation_cache_lock:
+        cached = _recommendation_cache.get(cache_key)
+        if cached is not None:
+            _recommendation_cache.move_to_end(cache_key)
+            return dict(cached)
+    
+    recommendation = _request_grok_recommendation(api_key, image_stats, payload_size, goal)
+    
+    # Fallbacks may stand in for a transient API failure, so only keep Grok answers
+    if recommendation.get('source') == 'grok':
+        with _recommendation_cache_lock:
+            _recommendation_cache[cache_key] = dict(recommendation)
+            if len(_recommendation_cache) > RECOMMENDATION_CACHE_SIZE:
+                _recommendation_cache.popitem(last=False)
+    
+    return recommendation
+
+
+def _request_grok_recommendation(api_key: str, image_stats: dict, payload_size: int, goal: str) -> dict:
+    suitability_info = image_stats.get('suitability', 'Unknown')
+    capacity_1bit = image_stats.get('capacity_at_1bit', image_stats.get('max_capacity_bytes', 0))
+    capacity_2bit = image_stats.get('capacity_at_2bit', capacity_1bit * 2)
+    capacity_4bit = image_stats.get('capacity_at_4bit', capacity_1bit * 4)
+    
+    capacity_ratio_1bit = (payload_size / capacity_1bit * 100) if capacity_1bit > 0 else 0
+    capacity_ratio_2bit = (payload_size / capacity_2bit * 100) if capacity_2bit > 0 else 0
+    
+    prompt = _RECOMMENDATION_PROMPT % {
+        'width': image_stats['width'],
+        'height': image_stats['height'],
+        'format': image_stats['format'],
+        'total_pixels': image_stats.get('total_pixels', 'N/A'),
+        'entropy': image_stats['entropy'],
+        'variance': image_stats['variance'],
+        'edge_density': image_stats['edge_density'],
+        'texture_score': image_stats['texture_score'],
+        'noise_level': image_stats['noise_level'],
+        'suitability': suitability_info,
+        'payload_size': payload_size,
+        'payload_kb': payload_size / 1024,
+        'capacity_1bit': capacity_1bit,
+        'capacity_ratio_1bit': capacity_ratio_1bit,
+        'capacity_2bit': capacity_2bit,
+        'capacity_ratio_2bit': capacity_ratio_2bit,
+        'capacity_4bit': capacity_4bit,
+        'goal': goal
+    }
 
     max_retries = 2
     for attempt in range(max_retries):
         try:
-            response = requests.post(
+            response = _session.post(
                 "https://api.x.ai/v1/chat/completions",
                 headers={
                     "Content-Type": "application/json",
@@ -81,13 +189,14 @@ Respond with ONLY valid JSON (no markdown, no extra text):
                     ],
                     "model": "grok-beta",
                     "temperature": 0.2,
-                    "max_tokens": 500
+                    "max_tokens": 500,
+                    "response_format": {"type": "json_object"}
                 },
                 timeout=45
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 
                 if 'choices' not in result or len(result['choices']) == 0:
                     print(f"Warning: Unexpected API response structure")
@@ -96,43 +205,21 @@ Respond with ONLY valid JSON (no markdown, no extra text):
                         continue
                     return get_fallback_recommendation(image_stats, payload_size)
                 
-                content = result['choices'][0]['message']['content']
-                
-                content = content.strip()
-                if content.startswith('```json'):
-                    content = content[7:]
-                elif content.startswith('```'):
-                    content = content[3:]
-                if content.endswith('```'):
-                    content = content[:-3]
-                content = content.strip()
+                content = _strip_fences(result['choices'][0]['message']['content'])
                 
                 try:
-                    recommendation = json.loads(content)
-                except json.JSONDecodeError as je:
+                    recommendation = _validate_recommendation(orjson.loads(content))
+                except orjson.JSONDecodeError as je:
                     print(f"Warning: Failed to parse AI response as JSON: {je}")
+                    recommendation = None
+                
+                if recommendation is None:
                     if attempt < max_retries - 1:
                         time.sleep(1)
                         continue
                     return get_fallback_recommendation(image_stats, payload_size)
                 
-                bits_per_channel = recommendation.get('bits_per_channel', 1)
-                if not isinstance(bits_per_channel, int):
-                    try:
-                        bits_per_channel = int(bits_per_channel)
-                    except:
-                        bits_per_channel = 1
-                bits_per_channel = min(max(bits_per_channel, 1), 4)
-                
-                return {
-                    'algorithm': recommendation.get('algorithm', 'LSB'),
-                    'bits_per_channel': bits_per_channel,
-                    'region_hint': recommendation.get('region_hint', 'distributed embedding'),
-                    'explanation': recommendation.get('explanation', 'AI-generated recommendation'),
-                    'confidence': min(max(float(recommendation.get('confidence', 0.8)), 0.0), 1.0),
-                    'detection_risk': recommendation.get('detection_risk', 'unknown'),
-                    'source': 'grok'
-                }
+                return recommendation
             elif response.status_code == 401:
                 print(f"Error: Invalid Grok API key. Using fallback recommendation.")
                 return get_fallback_recommendation(image_stats, payload_size)
@@ -168,24 +255,29 @@ Respond with ONLY valid JSON (no markdown, no extra text):
     return get_fallback_recommendation(image_stats, payload_size)
 
 
+# Complexity score = 0.3*entropy/8 + 0.3*min(variance/2000, 1)
+#                  + 0.2*min(edge_density/0.2, 1) + 0.2*min(texture_score/200, 1),
+# with the divisions folded into the weights and the clamps applied to the raw values.
+_COMPLEXITY_KEYS = ('entropy', 'variance', 'edge_density', 'texture_score')
+_COMPLEXITY_WEIGHTS = (0.0375, 0.00015, 1.0, 0.001)
+_COMPLEXITY_CAPS = (float('inf'), 2000.0, 0.2, 200.0)
+
+
+def _complexity_score(image_stats: dict) -> float:
+    return sum(
+        weight * min(image_stats.get(key, 0), cap)
+        for key, weight, cap in zip(_COMPLEXITY_KEYS, _COMPLEXITY_WEIGHTS, _COMPLEXITY_CAPS)
+    )
+
+
 def get_fallback_recommendation(image_stats: dict, payload_size: int) -> dict:
     max_capacity = image_stats.get('max_capacity_bytes', 1)
     if max_capacity == 0:
         max_capacity = 1
     
     capacity_ratio = payload_size / max_capacity
-    
     texture_score = image_stats.get('texture_score', 0)
-    entropy = image_stats.get('entropy', 0)
-    variance = image_stats.get('variance', 0)
-    edge_density = image_stats.get('edge_density', 0)
-    
-    complexity_score = (
-        (entropy / 8.0) * 0.3 +
-        (min(variance / 2000, 1.0)) * 0.3 +
-        (min(edge_density / 0.2, 1.0)) * 0.2 +
-        (min(texture_score / 200, 1.0)) * 0.2
-    )
+    complexity_score = _complexity_score(image_stats)
     
     if capacity_ratio > 0.9:
         bits_per_channel = 4
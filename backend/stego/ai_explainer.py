@@ -1,103 +1,465 @@
 """
 AI Explainer Module - Provides contextual AI explanations and learning assistance
 """
-import requests
-import json
+import asyncio
+import functools
+import hashlib
+import orjson
 import os
-from typing import Dict, Optional, List
+import random
+import re
+import threading
+from collections import OrderedDict, deque
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, List, Tuple
 
 
-class AIExplainer:
+RESPONSE_CACHE_SIZE = 512
+CONVERSATION_HISTORY_SIZE = 32
+# Completion budgets: prose answers are a few sentences, JSON answers need the whole object
+EXPLANATION_MAX_TOKENS = 160
+CHAT_MAX_TOKENS = 250
+JSON_MAX_TOKENS = 800
+# Keep-alive connections held open to api.x.ai per client
+GROK_POOL_SIZE = 32
+# Async calls retry transient failures with exponentially growing, fully jittered delays
+GROK_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+GROK_MAX_ATTEMPTS = 3
+GROK_RETRY_BASE_DELAY = 0.5
+GROK_RETRY_MAX_DELAY = 8.0
+
+# Context-free chat answers, keyed by the normalised question text
+CHAT_CACHE_SIZE = 1024
+
+# Fallback chat: one scan of the question finds every topic keyword it mentions
+_FALLBACK_TOPIC_PATTERN = re.compile(r"lsb|dct|dwt|psnr|ssim|security|safe|detect|capacity", re.IGNORECASE)
+
+_FALLBACK_TOPICS = {
+    "lsb": "lsb",
+    "dct": "dct",
+    "dwt": "dwt",
+    "psnr": "metrics",
+    "ssim": "metrics",
+    "security": "security",
+    "safe": "security",
+    "detect": "security",
+    "capacity": "capacity"
+}
+
+_FALLBACK_ANSWERS = {
+    "lsb": "LSB (Least Significant Bit) steganography replaces the least significant bits of pixel values with your secret data. It's simple and effective for images with good texture. Higher bits per channel = more capacity but more detectable.",
+    "dct": "DCT (Discrete Cosine Transform) embeds data in frequency domain, similar to JPEG compression. It's resistant to compression and ideal for images shared online, though it has lower capacity than LSB.",
+    "dwt": "DWT (Discrete Wavelet Transform) uses wavelet decomposition for embedding. It offers excellent invisibility and robustness, making it suitable for high-security applications where detection must be minimal.",
+    "metrics": "PSNR (Peak Signal-to-Noise Ratio) and SSIM (Structural Similarity Index) measure image quality after embedding. Higher PSNR (>40dB) and SSIM (>0.95) mean better invisibility. These metrics help assess detection risk.",
+    "security": "For maximum security: use encryption, choose high-texture images, minimize bits per channel, and avoid platforms that compress images. Statistical analysis is the main detection method, so randomizing your payload with encryption is crucial.",
+    "capacity": "Capacity depends on carrier size and bits per channel. For images: capacity = width × height × 3 channels × bits_per_channel ÷ 8 bytes. Trade-off: higher capacity = higher detection risk."
+}
+
+_FALLBACK_DEFAULT_ANSWER = "I'm here to help you understand steganography! Ask me about algorithms (LSB, DCT, DWT), security concerns, quality metrics (PSNR, SSIM), or best practices for hiding data securely."
+
+
+# Fallback comparison data, built once at import
+_ALGO_PROFILES = MappingProxyType({
+    "LSB": {
+        "capacity_score": 100,
+        "security_score": 60,
+        "robustness_score": 50,
+        "complexity_score": 90
+    },
+    "DCT": {
+        "capacity_score": 65,
+        "security_score": 80,
+        "robustness_score": 90,
+        "complexity_score": 60
+    },
+    "DWT": {
+        "capacity_score": 70,
+        "security_score": 85,
+        "robustness_score": 85,
+        "complexity_score": 50
+    },
+    "AUDIO": {
+        "capacity_score": 95,
+        "security_score": 70,
+        "robustness_score": 65,
+        "complexity_score": 75
+    },
+    "VIDEO": {
+        "capacity_score": 100,
+        "security_score": 75,
+        "robustness_score": 70,
+        "complexity_score": 55
+    }
+})
+
+_USE_CASE_MAP = MappingProxyType({
+    "LSB": "Best for large payloads in lossless images (PNG, BMP). Fast and simple spatial domain technique.",
+    "DCT": "Ideal for JPEG images and web sharing. Resistant to compression and lossy transformations.",
+    "DWT": "Professional-grade wavelet embedding. Excellent imperceptibility and robustness for high-security needs.",
+    "AUDIO": "Perfect for audio-based covert communication in WAV files. Large capacity with inaudible modifications.",
+    "VIDEO": "Massive capacity across multiple frames. Supports MP4, AVI, MOV, and MKV formats."
+})
+
+
+# First ```json / ``` markdown fence in a reply, even with prose around it or no closing fence
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*(?:```|$)', re.DOTALL | re.IGNORECASE)
+
+
+# Asks the API for a single valid JSON object as the reply
+_JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+
+def _extract_json(text: str) -> str:
+    match = _FENCE_RE.search(text)
+    return match.group(1) if match else text.strip()
+
+
+# Words and numbers (decimals kept whole); everything else is separator
+_WORD_RE = re.compile(r"\w+(?:\.\d+)*")
+
+
+def _normalize_question(text: str) -> str:
+    """Case-folded words joined by single spaces, so only case, punctuation and spacing differ"""
+    return " ".join(_WORD_RE.findall(text.casefold()))
+
+
+_SSE_EVENT_END = re.compile(rb"\r?\n\r?\n")
+
+
+class _SSEDecoder:
     """
-    Provides AI-powered explanations and learning assistance for steganography concepts
+    Incremental Server-Sent Events decoder
+    
+    Bytes are buffered until a blank line closes the event, so a data line split across
+    network chunks is never parsed half-received. feed() returns the data payload of
+    every completed event, multi-line data fields joined with newlines.
     """
     
     def __init__(self):
-        self.api_key = os.getenv("GROK_API_KEY")
-        self.api_url = "https://api.x.ai/v1/chat/completions"
-        self.model = "grok-beta"
-        self.conversation_history: List[Dict] = []
+        self._buffer = bytearray()
     
-    def explain_algorithm_choice(self, algorithm: str, image_stats: dict, recommendation: dict) -> str:
-        """Explain why a specific algorithm was recommended"""
-        
-        if not self.api_key:
-            return self._fallback_algorithm_explanation(algorithm, image_stats, recommendation)
+    def feed(self, chunk: bytes) -> List[bytes]:
+        self._buffer += chunk
+        events = []
+        while True:
+            match = _SSE_EVENT_END.search(self._buffer)
+            if match is None:
+                return events
+            
+            block = bytes(self._buffer[:match.start()])
+            del self._buffer[:match.end()]
+            
+            data = [
+                line[6:] if line.startswith(b'data: ') else line[5:]
+                for line in block.replace(b'\r\n', b'\n').split(b'\n')
+                if line.startswith(b'data:')
+            ]
+            if data:
+                events.append(b'\n'.join(data))
+
+
+def _delta_content(event: Dict) -> Optional[str]:
+    choices = event.get('choices')
+    if choices:
+        return choices[0].get('delta', {}).get('content')
+    return None
+
+
+class _AnswerCache:
+    """Exact-match chat answer cache with least-recently-used eviction"""
+    
+    def __init__(self, size: int):
+        self._size = size
+        self._answers: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            answer = self._answers.get(key)
+            if answer is not None:
+                self._answers.move_to_end(key)
+            return answer
+    
+    def add(self, key: str, answer: str) -> None:
+        if not key:
+            return
         
-        prompt = f"""You are a steganography expert teaching a user about algorithm selection.
+        with self._lock:
+            self._answers[key] = answer
+            self._answers.move_to_end(key)
+            if len(self._answers) > self._size:
+                self._answers.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._answers.clear()
+
+
+def _round_metric(value, digits: int = 2):
+    # Near-identical metrics share a prompt, and so a cached response
+    return round(value, digits) if isinstance(value, (int, float)) else value
+
+
+# Only the keys the model needs go into prompts: fewer tokens, and nothing sensitive
+_RELEVANT_STATS = ('width', 'height', 'entropy', 'texture_score', 'variance', 'edge_density')
+_RELEVANT_SETTINGS = ('bits_per_channel', 'bits_per_sample', 'strength', 'wavelet', 'frame_skip', 'profile')
+
+
+def _compact_stats(values: dict, keys: Tuple[str, ...] = _RELEVANT_STATS) -> Dict:
+    """The listed keys only, floats rounded to 3 places and None values dropped"""
+    compact = {}
+    for key in keys:
+        value = values.get(key)
+        if value is not None:
+            compact[key] = round(value, 3) if isinstance(value, float) else value
+    return compact
+
+
+def _compact_settings(settings: dict) -> Dict:
+    compact = _compact_stats(settings, _RELEVANT_SETTINGS)
+    # The model only needs to know encryption is on, never the key itself
+    compact['encrypted'] = bool(settings.get('encryption_key') or settings.get('encrypted'))
+    return compact
 
-SELECTED ALGORITHM: {algorithm}
+
+def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    # A numeric Retry-After from the server wins; HTTP-date values fall back to jitter
+    if retry_after:
+        try:
+            return min(float(retry_after), GROK_RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0, min(GROK_RETRY_BASE_DELAY * 2 ** attempt, GROK_RETRY_MAX_DELAY))
+
+
+def _parse_json_reply(text: str) -> Any:
+    # JSON mode replies are bare JSON; fence extraction only runs if the model ignored it
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return orjson.loads(_extract_json(text))
+
+
+# User-message templates for the explainer calls, filled with str.format_map
+_ALGO_PROMPT = """SELECTED ALGORITHM: {algorithm}
 IMAGE CHARACTERISTICS:
-- Dimensions: {image_stats.get('width')}x{image_stats.get('height')}
-- Entropy: {image_stats.get('entropy')} (complexity)
-- Texture Score: {image_stats.get('texture_score')}
-- Variance: {image_stats.get('variance')}
-- Edge Density: {image_stats.get('edge_density')}
+- Dimensions: {width}x{height}
+- Entropy: {entropy} (complexity)
+- Texture Score: {texture_score}
+- Variance: {variance}
+- Edge Density: {edge_density}
 
 AI RECOMMENDATION:
-- Bits per channel: {recommendation.get('bits_per_channel')}
-- Detection Risk: {recommendation.get('detection_risk')}
-- Confidence: {recommendation.get('confidence')}
+- Bits per channel: {bits_per_channel}
+- Detection Risk: {detection_risk}
+- Confidence: {confidence}"""
+
+_SECURITY_PROMPT = """ALGORITHM: {algorithm}
+SETTINGS: {settings}
+QUALITY METRICS:
+- PSNR: {psnr} dB (higher = less visible changes)
+- SSIM: {ssim} (closer to 1.0 = more similar)
+- MSE: {mse} (lower = fewer changes)"""
 
-Explain in 2-3 sentences why this algorithm and these settings are optimal for this image. 
+_COMPARE_PROMPT = """ALGORITHM 1: {algorithm1}
+ALGORITHM 2: {algorithm2}"""
+
+_CHAT_PROMPT = "{context}\n\nUser question: {question}"
+
+_CHAT_CONTEXT_LINES = MappingProxyType({
+    'current_algorithm': "\nUser is currently using: {}",
+    'image_stats': "\nCurrent image stats: {}",
+    'last_operation': "\nLast operation: {}",
+})
+
+
+class AIExplainer:
+    """
+    Provides AI-powered explanations and learning assistance for steganography concepts
+    """
+    
+    # Instructions are fixed system messages and only the per-call data goes in the
+    # user message, so every request shares a byte-identical prefix the provider can cache.
+    SYSTEM_ALGO = """You are a steganography expert teaching a user about algorithm selection.
+
+The user message gives the selected algorithm, the carrier image characteristics and the AI recommendation.
+Explain in 2-3 sentences why this algorithm and these settings are optimal for this image.
 Make it educational and easy to understand for someone learning steganography.
 Focus on the relationship between image characteristics and algorithm choice."""
 
-        try:
-            response = self._call_grok_api(prompt, temperature=0.3)
-            return response.strip()
-        except Exception as e:
-            print(f"AI Explainer error: {e}")
-            return self._fallback_algorithm_explanation(algorithm, image_stats, recommendation)
-    
-    def explain_security_risk(self, metrics: dict, algorithm: str, settings: dict) -> Dict:
-        """Provide detailed security risk analysis and mitigation suggestions"""
-        
-        if not self.api_key:
-            return self._fallback_security_analysis(metrics, algorithm, settings)
-        
-        prompt = f"""You are a security expert analyzing steganography risks.
+    SYSTEM_SECURITY = """You are a security expert analyzing steganography risks.
 
-ALGORITHM: {algorithm}
-SETTINGS: {json.dumps(settings)}
-QUALITY METRICS:
-- PSNR: {metrics.get('psnr', 'N/A')} dB (higher = less visible changes)
-- SSIM: {metrics.get('ssim', 'N/A')} (closer to 1.0 = more similar)
-- MSE: {metrics.get('mse', 'N/A')} (lower = fewer changes)
+The user message gives the algorithm, its settings and the quality metrics of the stego output:
+PSNR in dB (higher = less visible changes), SSIM (closer to 1.0 = more similar), MSE (lower = fewer changes).
 
 Provide a JSON response with:
-{{
+{
   "risk_level": "low/medium/high/critical",
   "detection_probability": "percentage estimate",
   "vulnerabilities": ["list of 3-4 specific vulnerabilities"],
   "mitigation_steps": ["list of 3-4 actionable recommendations"],
-  "platforms_analysis": {{
+  "platforms_analysis": {
     "social_media": "risk assessment for Instagram/Facebook/Twitter",
     "email": "risk assessment for email attachments",
     "cloud_storage": "risk assessment for cloud services"
-  }},
+  },
   "summary": "2-3 sentence overall assessment"
-}}
+}
 
 Be specific and practical. Consider statistical attacks, visual inspection, and platform-specific compression."""
 
-        try:
-            response = self._call_grok_api(prompt, temperature=0.2)
-            # Parse JSON response
-            content = response.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            elif content.startswith('```'):
-                content = content[3:]
-            if content.endswith('```'):
-                content = content[:-3]
-            content = content.strip()
+    SYSTEM_CHAT = """You are an expert steganography assistant helping users understand data hiding techniques.
+
+Your role:
+- Explain steganography concepts clearly and concisely
+- Answer technical questions about algorithms (LSB, DCT, DWT)
+- Provide security and privacy advice
+- Help users understand metrics (PSNR, SSIM, MSE)
+- Suggest best practices for secure steganography
+
+Keep responses:
+- Clear and educational (2-4 sentences)
+- Practical and actionable
+- Friendly but professional
+- Technically accurate"""
+
+    SYSTEM_COMPARE = """Compare the two steganography algorithms named in the user message for a user deciding which to use.
+
+Provide JSON response:
+{
+  "capacity": {"winner": "algorithm name", "explanation": "why"},
+  "security": {"winner": "algorithm name", "explanation": "why"},
+  "robustness": {"winner": "algorithm name", "explanation": "why"},
+  "complexity": {"winner": "algorithm name", "explanation": "why"},
+  "use_cases": {
+    "<algorithm 1>": "best use cases",
+    "<algorithm 2>": "best use cases"
+  },
+  "recommendation": "which to choose and when"
+}"""
+    
+    def __init__(self):
+        self.api_key = os.getenv("GROK_API_KEY")
+        self.api_url = "https://api.x.ai/v1/chat/completions"
+        self.model = "grok-beta"
+        self._base_payload = {"model": self.model}
+        # Bounded so the process-wide instance can never accumulate turns without limit
+        self.conversation_history: Deque[Dict] = deque(maxlen=CONVERSATION_HISTORY_SIZE)
+        # Created on first network use, so the no-API-key fallback path never imports requests
+        self._session = None
+        self._session_lock = threading.Lock()
+        # Async counterpart of the session, also created on first use
+        self._client = None
+        # Cache key -> task for async calls still waiting on Grok; event loop thread only
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+        # Same for context-free chat, keyed by normalised question
+        self._chat_inflight: Dict[str, asyncio.Future] = {}
+        self._response_cache = OrderedDict()
+        self._response_cache_lock = threading.Lock()
+        self._chat_cache = _AnswerCache(CHAT_CACHE_SIZE)
+    
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+    
+    def _create_session(self):
+        """Pooled keep-alive session, so repeat calls skip the TCP+TLS handshake"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        session = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False
+        )
+        # Sized for the grok executor plus threadpool callers (chat streams), so
+        # concurrent calls never overflow the pool and drop connections after use
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=GROK_POOL_SIZE, max_retries=retry)
+        session.mount("https://", adapter)
+        session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        })
+        return session
+    
+    @property
+    def client(self):
+        # Only touched from the event loop thread, so no lock is needed
+        if self._client is None:
+            import httpx
             
-            return json.loads(content)
+            self._client = httpx.AsyncClient(
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.api_key}"
+                },
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=GROK_POOL_SIZE),
+                # Retries failed connection attempts only; HTTP errors are left to the fallbacks
+                transport=httpx.AsyncHTTPTransport(retries=2)
+            )
+        return self._client
+    
+    def explain_algorithm_choice(self, algorithm: str, image_stats: dict, recommendation: dict) -> str:
+        """Explain why a specific algorithm was recommended"""
+        
+        if not self.api_key:
+            return self._fallback_algorithm_explanation(algorithm, image_stats, recommendation)
+        
+        prompt = self._algo_prompt(algorithm, image_stats, recommendation)
+        
+        try:
+            response = self._call_grok_api(prompt, system_prompt=self.SYSTEM_ALGO, temperature=0.3, max_tokens=EXPLANATION_MAX_TOKENS)
+            return response.strip()
+        except Exception as e:
+            print(f"AI Explainer error: {e}")
+            return self._fallback_algorithm_explanation(algorithm, image_stats, recommendation)
+    
+    def _algo_prompt(self, algorithm: str, image_stats: dict, recommendation: dict) -> str:
+        return _ALGO_PROMPT.format_map({
+            'algorithm': algorithm,
+            'width': image_stats.get('width'),
+            'height': image_stats.get('height'),
+            'entropy': _round_metric(image_stats.get('entropy'), 1),
+            'texture_score': _round_metric(image_stats.get('texture_score'), 1),
+            'variance': _round_metric(image_stats.get('variance'), 1),
+            'edge_density': _round_metric(image_stats.get('edge_density')),
+            'bits_per_channel': recommendation.get('bits_per_channel'),
+            'detection_risk': recommendation.get('detection_risk'),
+            'confidence': _round_metric(recommendation.get('confidence')),
+        })
+    
+    def explain_security_risk(self, metrics: dict, algorithm: str, settings: dict) -> Dict:
+        """Provide detailed security risk analysis and mitigation suggestions"""
+        
+        if not self.api_key:
+            return self._fallback_security_analysis(metrics, algorithm, settings)
+        
+        prompt = self._security_prompt(metrics, algorithm, settings)
+        
+        try:
+            return self._call_grok_api(prompt, system_prompt=self.SYSTEM_SECURITY, temperature=0.2, json_mode=True, parse=_parse_json_reply)
         except Exception as e:
             print(f"AI Security Analysis error: {e}")
             return self._fallback_security_analysis(metrics, algorithm, settings)
     
+    def _security_prompt(self, metrics: dict, algorithm: str, settings: dict) -> str:
+        return _SECURITY_PROMPT.format_map({
+            'algorithm': algorithm,
+            'settings': orjson.dumps(_compact_settings(settings)).decode(),
+            'psnr': _round_metric(metrics.get('psnr', 'N/A')),
+            'ssim': _round_metric(metrics.get('ssim', 'N/A')),
+            'mse': _round_metric(metrics.get('mse', 'N/A')),
+        })
+    
     def chat_response(self, user_question: str, context: Optional[Dict] = None) -> str:
         """
         Respond to user questions about steganography with context awareness
@@ -106,105 +468,424 @@ Be specific and practical. Consider statistical attacks, visual inspection, and
         if not self.api_key:
             return self._fallback_chat_response(user_question)
         
-        system_prompt = """You are an expert steganography assistant helping users understand data hiding techniques.
+        # Context-dependent answers must not be shared, so only bare questions use the cache
+        question_key = None
+        if not context:
+            question_key = _normalize_question(user_question)
+            cached = self._chat_cache.lookup(question_key)
+            if cached is not None:
+                return cached
         
-Your role:
-- Explain steganography concepts clearly and concisely
-- Answer technical questions about algorithms (LSB, DCT, DWT)
-- Provide security and privacy advice
-- Help users understand metrics (PSNR, SSIM, MSE)
-- Suggest best practices for secure steganography
-
-Keep responses:
-- Clear and educational (2-4 sentences)
-- Practical and actionable
-- Friendly but professional
-- Technically accurate"""
-
+        user_prompt = self._chat_prompt(user_question, context)
+        
+        try:
+            answer = self._call_grok_api(user_prompt, system_prompt=self.SYSTEM_CHAT, temperature=0.4, max_tokens=CHAT_MAX_TOKENS, use_cache=False)
+        except Exception as e:
+            print(f"AI Chat error: {e}")
+            return self._fallback_chat_response(user_question)
+        
+        if question_key is not None:
+            self._chat_cache.add(question_key, answer)
+        return answer
+    
+    def _chat_prompt(self, user_question: str, context: Optional[Dict]) -> str:
         # Build context-aware prompt
         context_info = ""
         if context:
-            if 'current_algorithm' in context:
-                context_info += f"\nUser is currently using: {context['current_algorithm']}"
-            if 'image_stats' in context:
-                context_info += f"\nCurrent image stats: {json.dumps(context['image_stats'], indent=2)}"
-            if 'last_operation' in context:
-                context_info += f"\nLast operation: {context['last_operation']}"
+            for key, line in _CHAT_CONTEXT_LINES.items():
+                if key in context:
+                    value = context[key]
+                    if key == 'image_stats':
+                        value = orjson.dumps(_compact_stats(value)).decode()
+                    context_info += line.format(value)
+        
+        return _CHAT_PROMPT.format_map({'context': context_info, 'question': user_question})
+    
+    def generate_comparison(self, algorithm1: str, algorithm2: str) -> Dict:
+        """Compare two steganography algorithms"""
+        
+        if not self.api_key:
+            return self._fallback_comparison(algorithm1, algorithm2)
+        
+        prompt = self._compare_prompt(algorithm1, algorithm2)
+        
+        try:
+            return self._call_grok_api(prompt, system_prompt=self.SYSTEM_COMPARE, temperature=0.3, json_mode=True, parse=_parse_json_reply)
+        except Exception as e:
+            print(f"AI Comparison error: {e}")
+            return self._fallback_comparison(algorithm1, algorithm2)
+    
+    def _compare_prompt(self, algorithm1: str, algorithm2: str) -> str:
+        # The comparison is symmetric, so both orders of a pair share one cached answer
+        first, second = sorted((algorithm1, algorithm2))
+        return _COMPARE_PROMPT.format_map({'algorithm1': first, 'algorithm2': second})
+    
+    # Async variants: these await the Grok call on a shared httpx.AsyncClient, so request
+    # handlers never block the event loop or tie up a worker thread while waiting.
+    
+    async def aexplain_algorithm_choice(self, algorithm: str, image_stats: dict, recommendation: dict) -> str:
+        if not self.api_key:
+            return self._fallback_algorithm_explanation(algorithm, image_stats, recommendation)
         
-        user_prompt = f"{context_info}\n\nUser question: {user_question}"
+        prompt = self._algo_prompt(algorithm, image_stats, recommendation)
         
         try:
-            return self._call_grok_api(user_prompt, system_prompt=system_prompt, temperature=0.4)
+            response = await self._call_grok_api_async(prompt, system_prompt=self.SYSTEM_ALGO, temperature=0.3, max_tokens=EXPLANATION_MAX_TOKENS)
+            return response.strip()
+        except Exception as e:
+            print(f"AI Explainer error: {e}")
+            return self._fallback_algorithm_explanation(algorithm, image_stats, recommendation)
+    
+    async def aexplain_security_risk(self, metrics: dict, algorithm: str, settings: dict) -> Dict:
+        if not self.api_key:
+            return self._fallback_security_analysis(metrics, algorithm, settings)
+        
+        prompt = self._security_prompt(metrics, algorithm, settings)
+        
+        try:
+            return await self._call_grok_api_async(prompt, system_prompt=self.SYSTEM_SECURITY, temperature=0.2, json_mode=True, parse=_parse_json_reply)
+        except Exception as e:
+            print(f"AI Security Analysis error: {e}")
+            return self._fallback_security_analysis(metrics, algorithm, settings)
+    
+    async def achat_response(self, user_question: str, context: Optional[Dict] = None) -> str:
+        if not self.api_key:
+            return self._fallback_chat_response(user_question)
+        
+        user_prompt = self._chat_prompt(user_question, context)
+        
+        # Identical context-free questions asked concurrently share one call; each call
+        # still carries a single user's question, so answers are never mixed across users
+        task = None
+        question_key = None if context else _normalize_question(user_question)
+        if question_key:
+            cached = self._chat_cache.lookup(question_key)
+            if cached is not None:
+                return cached
+            
+            task = self._chat_inflight.get(question_key)
+            if task is None:
+                task = asyncio.ensure_future(self._call_grok_api_async(
+                    user_prompt, system_prompt=self.SYSTEM_CHAT, temperature=0.4, max_tokens=CHAT_MAX_TOKENS, use_cache=False
+                ))
+                self._chat_inflight[question_key] = task
+                task.add_done_callback(lambda _: self._chat_inflight.pop(question_key, None))
+        
+        try:
+            if task is None:
+                answer = await self._call_grok_api_async(user_prompt, system_prompt=self.SYSTEM_CHAT, temperature=0.4, max_tokens=CHAT_MAX_TOKENS, use_cache=False)
+            else:
+                answer = await asyncio.shield(task)
         except Exception as e:
             print(f"AI Chat error: {e}")
             return self._fallback_chat_response(user_question)
+        
+        if question_key is not None:
+            self._chat_cache.add(question_key, answer)
+        return answer
     
-    def generate_comparison(self, algorithm1: str, algorithm2: str) -> Dict:
-        """Compare two steganography algorithms"""
+    async def achat_response_stream(self, user_question: str, context: Optional[Dict] = None) -> AsyncIterator[str]:
+        if not self.api_key:
+            yield self._fallback_chat_response(user_question)
+            return
+        
+        user_prompt = self._chat_prompt(user_question, context)
         
+        started = False
+        try:
+            async for delta in self._stream_grok_api(user_prompt, system_prompt=self.SYSTEM_CHAT, temperature=0.4, max_tokens=CHAT_MAX_TOKENS):
+                started = True
+                yield delta
+        except Exception as e:
+            print(f"AI Chat stream error: {e}")
+            if not started:
+                yield self._fallback_chat_response(user_question)
+    
+    async def agenerate_comparison(self, algorithm1: str, algorithm2: str) -> Dict:
         if not self.api_key:
             return self._fallback_comparison(algorithm1, algorithm2)
         
-        prompt = f"""Compare these steganography algorithms for a user deciding which to use:
-
-ALGORITHM 1: {algorithm1}
-ALGORITHM 2: {algorithm2}
-
-Provide JSON response:
-{{
-  "capacity": {{"winner": "algorithm name", "explanation": "why"}},
-  "security": {{"winner": "algorithm name", "explanation": "why"}},
-  "robustness": {{"winner": "algorithm name", "explanation": "why"}},
-  "complexity": {{"winner": "algorithm name", "explanation": "why"}},
-  "use_cases": {{
-    "{algorithm1}": "best use cases",
-    "{algorithm2}": "best use cases"
-  }},
-  "recommendation": "which to choose and when"
-}}"""
-
+        prompt = self._compare_prompt(algorithm1, algorithm2)
+        
         try:
-            response = self._call_grok_api(prompt, temperature=0.3)
-            content = response.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            elif content.startswith('```'):
-                content = content[3:]
-            if content.endswith('```'):
-                content = content[:-3]
-            return json.loads(content.strip())
+            return await self._call_grok_api_async(prompt, system_prompt=self.SYSTEM_COMPARE, temperature=0.3, json_mode=True, parse=_parse_json_reply)
         except Exception as e:
             print(f"AI Comparison error: {e}")
             return self._fallback_comparison(algorithm1, algorithm2)
     
-    def _call_grok_api(self, user_prompt: str, system_prompt: Optional[str] = None, temperature: float = 0.3) -> str:
-        """Make API call to Grok"""
+    async def bundle(
+        self,
+        algorithm: str,
+        image_stats: dict,
+        recommendation: dict,
+        metrics: dict,
+        settings: dict,
+        compare_with: Optional[str] = None
+    ) -> Dict:
+        """
+        Run the explanation, security analysis and (optionally) comparison calls concurrently
+        
+        Total latency is that of the slowest call rather than their sum; a call that raises
+        is replaced by its fallback so the other results are still returned.
+        """
+        calls = [
+            self.aexplain_algorithm_choice(algorithm, image_stats, recommendation),
+            self.aexplain_security_risk(metrics, algorithm, settings),
+        ]
+        if compare_with:
+            calls.append(self.agenerate_comparison(algorithm, compare_with))
+        
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        
+        explanation, analysis = results[0], results[1]
+        if isinstance(explanation, Exception):
+            explanation = self._fallback_algorithm_explanation(algorithm, image_stats, recommendation)
+        if isinstance(analysis, Exception):
+            analysis = self._fallback_security_analysis(metrics, algorithm, settings)
+        
+        bundle = {"explanation": explanation, "analysis": analysis}
+        if compare_with:
+            comparison = results[2]
+            if isinstance(comparison, Exception):
+                comparison = self._fallback_comparison(algorithm, compare_with)
+            bundle["comparison"] = comparison
+        return bundle
+    
+    async def warmup(self) -> None:
+        """
+        Open pooled connections to the Grok API ahead of the first request
+        
+        A HEAD request on each client completes the TCP+TLS handshake, leaving a kept-alive
+        connection for the first real call. Failures are only reported; calls connect lazily.
+        """
+        if not self.api_key:
+            return
+        
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            self.client.head(self.api_url, timeout=5.0),
+            loop.run_in_executor(None, functools.partial(self.session.head, self.api_url, timeout=5)),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Warning: Grok connection warm-up failed: {result}")
+    
+    async def aclose(self) -> None:
+        """Close the async HTTP client; a later async call opens a fresh one"""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+    
+    def clear_cache(self) -> None:
+        """Drop all cached Grok responses"""
+        with self._response_cache_lock:
+            self._response_cache.clear()
+        self._chat_cache.clear()
+    
+    def _call_grok_api(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = JSON_MAX_TOKENS,
+        json_mode: bool = False,
+        use_cache: bool = True,
+        parse: Optional[Callable[[str], Any]] = None
+    ) -> Any:
+        """
+        Make API call to Grok, answering repeated identical prompts from an LRU cache
+        
+        When parse is given its result is returned instead of the raw text, and a reply it
+        rejects is never cached, so a malformed answer is retried rather than replayed.
+        """
+        
+        cache_key = None
+        if use_cache:
+            cache_key = self._cache_key(user_prompt, system_prompt, temperature, max_tokens, json_mode)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return parse(cached) if parse else cached
+        
+        content = self._request_completion(user_prompt, system_prompt, temperature, max_tokens, json_mode)
+        result = parse(content) if parse else content
+        
+        if cache_key is not None:
+            self._cache_put(cache_key, content)
+        return result
+    
+    async def _call_grok_api_async(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = JSON_MAX_TOKENS,
+        json_mode: bool = False,
+        use_cache: bool = True,
+        parse: Optional[Callable[[str], Any]] = None
+    ) -> Any:
+        """
+        Awaitable _call_grok_api, sharing its response cache
         
+        Concurrent callers with the same cacheable prompt await a single in-flight request.
+        """
+        
+        if not use_cache:
+            content = await self._request_completion_async(user_prompt, system_prompt, temperature, max_tokens, json_mode)
+            return parse(content) if parse else content
+        
+        cache_key = self._cache_key(user_prompt, system_prompt, temperature, max_tokens, json_mode)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return parse(cached) if parse else cached
+        
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._request_completion_async(user_prompt, system_prompt, temperature, max_tokens, json_mode))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        
+        # Shielded so one caller being cancelled does not abort the request for the others
+        content = await asyncio.shield(task)
+        result = parse(content) if parse else content
+        
+        self._cache_put(cache_key, content)
+        return result
+    
+    def _cache_key(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool
+    ) -> bytes:
+        return hashlib.blake2b(
+            f"{system_prompt or ''}\x00{user_prompt}\x00{temperature}\x00{max_tokens}\x00{json_mode}".encode('utf-8'),
+            digest_size=16
+        ).digest()
+    
+    def _cache_get(self, cache_key: bytes) -> Optional[str]:
+        with self._response_cache_lock:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                self._response_cache.move_to_end(cache_key)
+            return cached
+    
+    def _cache_put(self, cache_key: bytes, content: str) -> None:
+        with self._response_cache_lock:
+            self._response_cache[cache_key] = content
+            if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+    
+    def _build_messages(self, user_prompt: str, system_prompt: Optional[str]) -> List[Dict]:
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": user_prompt})
-        
-        response = requests.post(
+        return messages
+    
+    def _payload(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool = False,
+        **extra
+    ) -> bytes:
+        """Serialized request body: the fixed fields come from a prebuilt template"""
+        if json_mode:
+            extra["response_format"] = _JSON_RESPONSE_FORMAT
+        return orjson.dumps({
+            **self._base_payload,
+            "messages": self._build_messages(user_prompt, system_prompt),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            **extra
+        })
+    
+    def _request_completion(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool
+    ) -> str:
+        response = self.session.post(
             self.api_url,
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            },
-            json={
-                "messages": messages,
-                "model": self.model,
-                "temperature": temperature,
-                "max_tokens": 800
-            },
-            timeout=30
+            data=self._payload(user_prompt, system_prompt, temperature, max_tokens, json_mode),
+            timeout=(5, 30)
         )
+        return self._completion_content(response.status_code, response.content)
+    
+    async def _request_completion_async(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool
+    ) -> str:
+        import httpx
         
-        if response.status_code == 200:
-            result = response.json()
+        body = self._payload(user_prompt, system_prompt, temperature, max_tokens, json_mode)
+        for attempt in range(GROK_MAX_ATTEMPTS):
+            final = attempt == GROK_MAX_ATTEMPTS - 1
+            try:
+                response = await self.client.post(self.api_url, content=body)
+            except (httpx.TimeoutException, httpx.ConnectError):
+                if final:
+                    raise
+                await asyncio.sleep(_backoff_delay(attempt))
+                continue
+            
+            if final or response.status_code not in GROK_RETRY_STATUSES:
+                return self._completion_content(response.status_code, response.content)
+            await asyncio.sleep(_backoff_delay(attempt, response.headers.get("Retry-After")))
+    
+    def _completion_content(self, status_code: int, body: bytes) -> str:
+        if status_code == 200:
+            result = orjson.loads(body)
             return result['choices'][0]['message']['content']
         else:
-            raise Exception(f"API returned status {response.status_code}")
+            raise Exception(f"API returned status {status_code}")
+    
+    async def _stream_grok_api(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = JSON_MAX_TOKENS
+    ) -> AsyncIterator[str]:
+        """Streaming Grok call on the shared httpx client, yielding content deltas from its SSE frames"""
+        
+        body = self._payload(user_prompt, system_prompt, temperature, max_tokens, stream=True)
+        for attempt in range(GROK_MAX_ATTEMPTS):
+            async with self.client.stream("POST", self.api_url, content=body) as response:
+                # Only a rejected request is retried; once deltas flow, errors propagate
+                if response.status_code in GROK_RETRY_STATUSES and attempt < GROK_MAX_ATTEMPTS - 1:
+                    delay = _backoff_delay(attempt, response.headers.get("Retry-After"))
+                elif response.status_code != 200:
+                    raise Exception(f"API returned status {response.status_code}")
+                else:
+                    async for event in self._iter_sse(response):
+                        delta = _delta_content(event)
+                        if delta:
+                            yield delta
+                    return
+            
+            await asyncio.sleep(delay)
+    
+    async def _iter_sse(self, response) -> AsyncIterator[Dict]:
+        """Parsed JSON events from an httpx streaming response, up to the [DONE] marker"""
+        decoder = _SSEDecoder()
+        async for chunk in response.aiter_bytes():
+            for data in decoder.feed(chunk):
+                if data == b'[DONE]':
+                    return
+                yield orjson.loads(data)
     
     # Fallback methods when API is unavailable
     
@@ -274,22 +955,14 @@ Provide JSON response:
     def _fallback_chat_response(self, question: str) -> str:
         """Fallback chat response"""
         
-        q_lower = question.lower()
-        
-        if "lsb" in q_lower:
-            return "LSB (Least Significant Bit) steganography replaces the least significant bits of pixel values with your secret data. It's simple and effective for images with good texture. Higher bits per channel = more capacity but more detectable."
-        elif "dct" in q_lower:
-            return "DCT (Discrete Cosine Transform) embeds data in frequency domain, similar to JPEG compression. It's resistant to compression and ideal for images shared online, though it has lower capacity than LSB."
-        elif "dwt" in q_lower:
-            return "DWT (Discrete Wavelet Transform) uses wavelet decomposition for embedding. It offers excellent invisibility and robustness, making it suitable for high-security applications where detection must be minimal."
-        elif "psnr" in q_lower or "ssim" in q_lower:
-            return "PSNR (Peak Signal-to-Noise Ratio) and SSIM (Structural Similarity Index) measure image quality after embedding. Higher PSNR (>40dB) and SSIM (>0.95) mean better invisibility. These metrics help assess detection risk."
-        elif "security" in q_lower or "safe" in q_lower or "detect" in q_lower:
-            return "For maximum security: use encryption, choose high-texture images, minimize bits per channel, and avoid platforms that compress images. Statistical analysis is the main detection method, so randomizing your payload with encryption is crucial."
-        elif "capacity" in q_lower:
-            return "Capacity depends on carrier size and bits per channel. For images: capacity = width × height × 3 channels × bits_per_channel ÷ 8 bytes. Trade-off: higher capacity = higher detection risk."
-        else:
-            return "I'm here to help you understand steganography! Ask me about algorithms (LSB, DCT, DWT), security concerns, quality metrics (PSNR, SSIM), or best practices for hiding data securely."
+        topics = {_FALLBACK_TOPICS[match.lower()] for match in _FALLBACK_TOPIC_PATTERN.findall(question)}
+        
+        # Answers are listed in priority order, so the first matched topic wins
+        for topic, answer in _FALLBACK_ANSWERS.items():
+            if topic in topics:
+                return answer
+        
+        return _FALLBACK_DEFAULT_ANSWER
     
     def _fallback_comparison(self, algo1: str, algo2: str) -> Dict:
         """Fallback algorithm comparison with detailed analysis"""
@@ -298,42 +971,8 @@ Provide JSON response:
         algo1 = algo1.upper()
         algo2 = algo2.upper()
         
-        # Detailed comparison data
-        algo_profiles = {
-            "LSB": {
-                "capacity_score": 100,
-                "security_score": 60,
-                "robustness_score": 50,
-                "complexity_score": 90
-            },
-            "DCT": {
-                "capacity_score": 65,
-                "security_score": 80,
-                "robustness_score": 90,
-                "complexity_score": 60
-            },
-            "DWT": {
-                "capacity_score": 70,
-                "security_score": 85,
-                "robustness_score": 85,
-                "complexity_score": 50
-            },
-            "AUDIO": {
-                "capacity_score": 95,
-                "security_score": 70,
-                "robustness_score": 65,
-                "complexity_score": 75
-            },
-            "VIDEO": {
-                "capacity_score": 100,
-                "security_score": 75,
-                "robustness_score": 70,
-                "complexity_score": 55
-            }
-        }
-        
-        profile1 = algo_profiles.get(algo1, algo_profiles["LSB"])
-        profile2 = algo_profiles.get(algo2, algo_profiles["LSB"])
+        profile1 = _ALGO_PROFILES.get(algo1, _ALGO_PROFILES["LSB"])
+        profile2 = _ALGO_PROFILES.get(algo2, _ALGO_PROFILES["LSB"])
         
         # Build dynamic comparison based on scores
         capacity_winner = algo1 if profile1["capacity_score"] > profile2["capacity_score"] else algo2
@@ -344,15 +983,6 @@ Provide JSON response:
         robustness_winner = algo1 if profile1["robustness_score"] > profile2["robustness_score"] else algo2
         complexity_winner = algo1 if profile1["complexity_score"] > profile2["complexity_score"] else algo2
         
-        # Use case descriptions
-        use_case_map = {
-            "LSB": "Best for large payloads in lossless images (PNG, BMP). Fast and simple spatial domain technique.",
-            "DCT": "Ideal for JPEG images and web sharing. Resistant to compression and lossy transformations.",
-            "DWT": "Professional-grade wavelet embedding. Excellent imperceptibility and robustness for high-security needs.",
-            "AUDIO": "Perfect for audio-based covert communication in WAV files. Large capacity with inaudible modifications.",
-            "VIDEO": "Massive capacity across multiple frames. Supports MP4, AVI, MOV, and MKV formats."
-        }
-        
         # Build recommendation string
         if capacity_winner == algo1 and security_winner == algo2:
             recommendation = f"Choose {algo1} for higher capacity needs or {algo2} for better security and robustness."
@@ -389,19 +1019,17 @@ Provide JSON response:
                 "score2": profile2["complexity_score"]
             },
             "use_cases": {
-                algo1: use_case_map.get(algo1, "General purpose steganography"),
-                algo2: use_case_map.get(algo2, "General purpose steganography")
+                algo1: _USE_CASE_MAP.get(algo1, "General purpose steganography"),
+                algo2: _USE_CASE_MAP.get(algo2, "General purpose steganography")
             },
             "recommendation": recommendation
         }
 
 
-# Singleton instance
-_explainer_instance = None
+# Singleton instance, built at import so the first request finds it ready. Construction
+# is cheap: the session is built on first network use and the executor starts threads on demand.
+EXPLAINER = AIExplainer()
 
 def get_explainer() -> AIExplainer:
-    """Get or create AIExplainer singleton instance"""
-    global _explainer_instance
-    if _explainer_instance is None:
-        _explainer_instance = AIExplainer()
-    return _explainer_instance
\ No newline at end of file
+    """Get the AIExplainer singleton instance"""
+    return EXPLAINER
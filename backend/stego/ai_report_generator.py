@@ -2,7 +2,7 @@
 AI-Powered Report Generator - Creates comprehensive technical reports for steganography operations
 """
 import os
-import json
+import orjson
 from datetime import datetime
 from typing import Dict, Optional
 import requests
@@ -287,19 +287,19 @@ Use clear, technical language suitable for a formal report."""
                     "Content-Type": "application/json",
                     "Authorization": f"Bearer {self.api_key}"
                 },
-                json={
+                data=orjson.dumps({
                     "messages": [
                         {"role": "user", "content": prompt}
                     ],
                     "model": "grok-beta",
                     "temperature": 0.2,
                     "max_tokens": 250
-                },
+                }),
                 timeout=20
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 return result['choices'][0]['message']['content'].strip()
         except Exception as e:
             print(f"Metrics interpretation error: {e}")
@@ -359,17 +359,17 @@ Make it professional and actionable."""
                     "Content-Type": "application/json",
                     "Authorization": f"Bearer {self.api_key}"
                 },
-                json={
+                data=orjson.dumps({
                     "messages": [{"role": "user", "content": prompt}],
                     "model": "grok-beta",
                     "temperature": 0.3,
                     "max_tokens": 300
-                },
+                }),
                 timeout=20
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 return result['choices'][0]['message']['content'].strip()
         except:
             pass
@@ -7,7 +7,7 @@ import cv2
 from typing import Dict, List, Tuple
 import os
 import requests
-import json
+import orjson
 from scipy import stats
 
 
@@ -25,6 +25,12 @@ class SteganographyDetector:
         Comprehensive analysis to detect potential steganography
         Returns detailed report with multiple detection methods
         """
+        return self.interpret_tests(self.run_tests(image_path))
+    
+    def run_tests(self, image_path: str) -> Dict:
+        """
+        Run the statistical detection tests and score them (CPU only, no network)
+        """
         
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Image not found: {image_path}")
@@ -34,47 +40,54 @@ class SteganographyDetector:
         img_array = np.array(img.convert('RGB'))
         
         # Run multiple detection tests
-        lsb_analysis = self._analyze_lsb_patterns(img_array)
-        histogram_analysis = self._analyze_histogram(img_array)
-        chi_square_test = self._chi_square_attack(img_array)
-        rs_analysis = self._rs_steganalysis(img_array)
-        visual_analysis = self._visual_attack(img_array)
-        statistical_analysis = self._statistical_analysis(img_array)
+        tests = {
+            'lsb_analysis': self._analyze_lsb_patterns(img_array),
+            'histogram_analysis': self._analyze_histogram(img_array),
+            'chi_square_test': self._chi_square_attack(img_array),
+            'rs_analysis': self._rs_steganalysis(img_array),
+            'visual_analysis': self._visual_attack(img_array),
+            'statistical_analysis': self._statistical_analysis(img_array)
+        }
         
         # Aggregate results
         detection_score = self._calculate_detection_score({
-            'lsb': lsb_analysis,
-            'histogram': histogram_analysis,
-            'chi_square': chi_square_test,
-            'rs': rs_analysis,
-            'visual': visual_analysis,
-            'statistical': statistical_analysis
+            'lsb': tests['lsb_analysis'],
+            'histogram': tests['histogram_analysis'],
+            'chi_square': tests['chi_square_test'],
+            'rs': tests['rs_analysis'],
+            'visual': tests['visual_analysis'],
+            'statistical': tests['statistical_analysis']
         })
         
+        return {
+            'overall_score': detection_score,
+            'tests': tests
+        }
+    
+    def interpret_tests(self, test_results: Dict) -> Dict:
+        """
+        Build the full report from run_tests output, including the AI interpretation
+        """
+        detection_score = test_results['overall_score']
+        tests = test_results['tests']
+        
         # Generate AI-powered interpretation
         ai_interpretation = self._get_ai_interpretation({
-            'lsb_analysis': lsb_analysis,
-            'histogram_analysis': histogram_analysis,
-            'chi_square_test': chi_square_test,
-            'rs_analysis': rs_analysis,
+            'lsb_analysis': tests['lsb_analysis'],
+            'histogram_analysis': tests['histogram_analysis'],
+            'chi_square_test': tests['chi_square_test'],
+            'rs_analysis': tests['rs_analysis'],
             'detection_score': detection_score
         })
         
         return {
             'overall_score': detection_score,
             'likelihood': self._score_to_likelihood(detection_score),
-            'tests': {
-                'lsb_analysis': lsb_analysis,
-                'histogram_analysis': histogram_analysis,
-                'chi_square_test': chi_square_test,
-                'rs_analysis': rs_analysis,
-                'visual_analysis': visual_analysis,
-                'statistical_analysis': statistical_analysis
-            },
+            'tests': tests,
             'ai_interpretation': ai_interpretation,
             'recommendations': self._generate_recommendations(detection_score, {
-                'lsb': lsb_analysis,
-                'chi_square': chi_square_test
+                'lsb': tests['lsb_analysis'],
+                'chi_square': tests['chi_square_test']
             })
         }
     
@@ -343,7 +356,7 @@ class SteganographyDetector:
         prompt = f"""You are a forensic steganalysis expert. Analyze these test results and provide a clear, professional interpretation.
 
 STEGANALYSIS RESULTS:
-{json.dumps(analysis_results, indent=2)}
+{orjson.dumps(analysis_results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()}
 
 Provide a 3-4 sentence expert interpretation that:
 1. Summarizes the findings in plain language
@@ -360,7 +373,7 @@ Be professional, clear, and avoid over-claiming certainty."""
                     "Content-Type": "application/json",
                     "Authorization": f"Bearer {self.api_key}"
                 },
-                json={
+                data=orjson.dumps({
                     "messages": [
                         {"role": "system", "content": "You are a forensic steganalysis expert providing professional analysis."},
                         {"role": "user", "content": prompt}
@@ -368,12 +381,12 @@ Be professional, clear, and avoid over-claiming certainty."""
                     "model": "grok-beta",
                     "temperature": 0.3,
                     "max_tokens": 400
-                },
+                }),
                 timeout=30
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 return result['choices'][0]['message']['content'].strip()
         except Exception as e:
             print(f"AI interpretation error: {e}")
@@ -431,4 +444,8 @@ def get_detector() -> SteganographyDetector:
     global _detector_instance
     if _detector_instance is None:
         _detector_instance = SteganographyDetector()
-    return _detector_instance
\ No newline at end of file
+    return _detector_instance
+
+def run_steganalysis_tests(image_path: str) -> Dict:
+    """Module-level entry point for run_tests, so it can be sent to a process pool"""
+    return get_detector().run_tests(image_path)
@@ -1,6 +1,7 @@
 import numpy as np
 import wave
 import struct
+from itertools import chain
 import os
 
 
@@ -64,7 +65,7 @@ def encode_audio_lsb(audio_path: str, payload: bytes, output_path: str, bits_per
         raise ValueError(f"Payload too large: {payload_length} bytes (max: {2**32 - 1})")
     
     length_bytes = struct.pack('>I', payload_length)
-    full_payload = length_bytes + payload
+    full_payload = chain(length_bytes, payload)
     
     payload_bits = []
     for byte in full_payload:
@@ -53,11 +53,21 @@ def decode_dct(stego_path: str, strength: float = 10.0) -> bytes:
             f"Can extract only {max_extractable_bytes} bytes (need at least 4 for header)"
         )
     
+    # Solid-colour blocks have no AC energy, so their (4, 4) coefficient is zero (bit 0)
+    tiles = img_array[:blocks_h * block_size, :blocks_w * block_size].reshape(
+        blocks_h, block_size, blocks_w, block_size, channels
+    )
+    uniform = np.ptp(tiles, axis=(1, 3)) == 0
+    
     extracted_bits = []
     
     for c in range(channels):
         for i in range(blocks_h):
             for j in range(blocks_w):
+                if uniform[i, j, c]:
+                    extracted_bits.append(0)
+                    continue
+                
                 y_start = i * block_size
                 y_end = y_start + block_size
                 x_start = j * block_size
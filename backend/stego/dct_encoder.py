@@ -2,9 +2,17 @@ import numpy as np
 from PIL import Image
 import cv2
 import struct
+from itertools import chain
 import os
 
 
+# Spatial pattern of the (4, 4) coefficient in an 8x8 block. A uniform block has
+# no AC energy, so embedding into it is just its value plus a scaled copy of this.
+_MID_FREQ_UNIT = np.zeros((8, 8), dtype=np.float32)
+_MID_FREQ_UNIT[4, 4] = 1.0
+_MID_FREQ_BASIS = cv2.idct(_MID_FREQ_UNIT)
+
+
 def encode_dct(carrier_path: str, payload: bytes, output_path: str, strength: float = 10.0) -> dict:
     if not os.path.exists(carrier_path):
         raise FileNotFoundError(f"Carrier image not found: {carrier_path}")
@@ -66,7 +74,7 @@ def encode_dct(carrier_path: str, payload: bytes, output_path: str, strength: fl
         raise ValueError(f"Payload too large: {payload_length} bytes (max: {2**32 - 1})")
     
     length_bytes = struct.pack('>I', payload_length)
-    full_payload = length_bytes + payload
+    full_payload = chain(length_bytes, payload)
     
     payload_bits = []
     for byte in full_payload:
@@ -76,6 +84,12 @@ def encode_dct(carrier_path: str, payload: bytes, output_path: str, strength: fl
     stego_img = img_array.copy()
     bit_index = 0
     
+    # One vectorized pass flags solid-colour blocks, which skip the DCT round trip
+    tiles = img_array[:blocks_h * block_size, :blocks_w * block_size].reshape(
+        blocks_h, block_size, blocks_w, block_size, channels
+    )
+    uniform = np.ptp(tiles, axis=(1, 3)) == 0
+    
     for c in range(channels):
         if bit_index >= len(payload_bits):
             break
@@ -95,14 +109,14 @@ def encode_dct(carrier_path: str, payload: bytes, output_path: str, strength: fl
                 
                 block = stego_img[y_start:y_end, x_start:x_end, c]
                 
-                dct_block = cv2.dct(block)
+                coefficient = strength if payload_bits[bit_index] == 1 else -strength
                 
-                if payload_bits[bit_index] == 1:
-                    dct_block[4, 4] = strength
+                if uniform[i, j, c]:
+                    idct_block = block[0, 0] + coefficient * _MID_FREQ_BASIS
                 else:
-                    dct_block[4, 4] = -strength
-                
-                idct_block = cv2.idct(dct_block)
+                    dct_block = cv2.dct(block)
+                    dct_block[4, 4] = coefficient
+                    idct_block = cv2.idct(dct_block)
                 
                 stego_img[y_start:y_end, x_start:x_end, c] = idct_block
                 bit_index += 1
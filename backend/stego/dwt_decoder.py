@@ -3,6 +3,7 @@ from PIL import Image
 import pywt
 import struct
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 
 def decode_dwt(stego_path: str, wavelet: str = 'haar', strength: float = 0.1) -> bytes:
@@ -51,12 +52,15 @@ def decode_dwt(stego_path: str, wavelet: str = 'haar', strength: float = 0.1) ->
             f"Can extract only {max_extractable_bytes} bytes (need at least 4 for header)"
         )
     
+    # Channel transforms are independent and pywt releases the GIL, so run them concurrently
+    with ThreadPoolExecutor(max_workers=channels) as executor:
+        coeffs_per_channel = list(executor.map(
+            lambda c: pywt.dwt2(img_array[:, :, c], wavelet), range(channels)
+        ))
+    
     extracted_bits = []
     
-    for c in range(channels):
-        channel_data = img_array[:, :, c]
-        
-        coeffs = pywt.dwt2(channel_data, wavelet)
+    for coeffs in coeffs_per_channel:
         cA, (cH, cV, cD) = coeffs
         
         cH_flat = cH.flatten()
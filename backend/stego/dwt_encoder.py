@@ -2,9 +2,33 @@ import numpy as np
 from PIL import Image
 import pywt
 import struct
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, repeat
 import os
 
 
+def _embed_channel(channel_data: np.ndarray, bits: list, wavelet: str, embedding_strength: float) -> np.ndarray:
+    coeffs = pywt.dwt2(channel_data, wavelet)
+    cA, (cH, cV, cD) = coeffs
+    
+    cH_flat = cH.flatten()
+    
+    for i, bit in enumerate(bits):
+        if bit == 1:
+            cH_flat[i] = embedding_strength
+        else:
+            cH_flat[i] = -embedding_strength
+    
+    cH = cH_flat.reshape(cH.shape)
+    
+    reconstructed = pywt.idwt2((cA, (cH, cV, cD)), wavelet)
+    
+    if reconstructed.shape != channel_data.shape:
+        reconstructed = reconstructed[:channel_data.shape[0], :channel_data.shape[1]]
+    
+    return reconstructed
+
+
 def encode_dwt(carrier_path: str, payload: bytes, output_path: str, wavelet: str = 'haar', strength: float = 0.1) -> dict:
     if not os.path.exists(carrier_path):
         raise FileNotFoundError(f"Carrier image not found: {carrier_path}")
@@ -64,7 +88,7 @@ def encode_dwt(carrier_path: str, payload: bytes, output_path: str, wavelet: str
         raise ValueError(f"Payload too large: {payload_length} bytes (max: {2**32 - 1})")
     
     length_bytes = struct.pack('>I', payload_length)
-    full_payload = length_bytes + payload
+    full_payload = chain(length_bytes, payload)
     
     payload_bits = []
     for byte in full_payload:
@@ -72,40 +96,25 @@ def encode_dwt(carrier_path: str, payload: bytes, output_path: str, wavelet: str
             payload_bits.append((byte >> (7 - i)) & 1)
     
     stego_img = img_array.copy()
-    bit_index = 0
-    
-    for c in range(channels):
-        if bit_index >= len(payload_bits):
-            break
-        
-        channel_data = stego_img[:, :, c]
-        
-        coeffs = pywt.dwt2(channel_data, wavelet)
-        cA, (cH, cV, cD) = coeffs
-        
-        cH_flat = cH.flatten()
-        
-        for i in range(len(cH_flat)):
-            if bit_index >= len(payload_bits):
-                break
-            
-            embedding_strength = strength * 100.0
-            
-            if payload_bits[bit_index] == 1:
-                cH_flat[i] = embedding_strength
-            else:
-                cH_flat[i] = -embedding_strength
-            
-            bit_index += 1
-        
-        cH = cH_flat.reshape(cH.shape)
-        
-        reconstructed = pywt.idwt2((cA, (cH, cV, cD)), wavelet)
-        
-        if reconstructed.shape != channel_data.shape:
-            reconstructed = reconstructed[:channel_data.shape[0], :channel_data.shape[1]]
-        
-        stego_img[:, :, c] = reconstructed
+    embedding_strength = strength * 100.0
+    
+    # Every channel's cH subband has the same size and carries its own contiguous
+    # run of bits, so the channels are independent and can be transformed concurrently
+    filter_len = pywt.Wavelet(wavelet).dec_len
+    band_size = pywt.dwt_coeff_len(height, filter_len, 'symmetric') * pywt.dwt_coeff_len(width, filter_len, 'symmetric')
+    used_channels = min(channels, -(-len(payload_bits) // band_size))
+    
+    with ThreadPoolExecutor(max_workers=used_channels) as executor:
+        reconstructed = list(executor.map(
+            _embed_channel,
+            [stego_img[:, :, c] for c in range(used_channels)],
+            [payload_bits[c * band_size:(c + 1) * band_size] for c in range(used_channels)],
+            repeat(wavelet, used_channels),
+            repeat(embedding_strength, used_channels)
+        ))
+    
+    for c, channel in enumerate(reconstructed):
+        stego_img[:, :, c] = channel
     
     stego_img = np.clip(stego_img, 0, 255).astype('uint8')
     stego_pil = Image.fromarray(stego_img, 'RGB')
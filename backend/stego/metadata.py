@@ -0,0 +1,57 @@
+import struct
+from typing import Optional, Tuple
+
+
+# Fixed-width frame: 7-byte magic, 1-byte flags, 16-byte raw IV (zeroed when unencrypted)
+HEADER_MAGIC = b"STEG\x01\x00\x00"
+FLAG_ENCRYPTED = 0x01
+
+_HEADER = struct.Struct('<7sB16s')
+HEADER_SIZE = _HEADER.size
+_PLAIN_HEADER = _HEADER.pack(HEADER_MAGIC, 0, bytes(16))
+
+# Text header written by earlier releases: STEGANO|<True/False>|<iv-hex>|
+LEGACY_HEADER_MAGIC = b'STEGANO|'
+_LEGACY_SCAN_LIMIT = 80
+
+
+def pack_header(iv: Optional[bytes] = None) -> bytes:
+    if iv is None:
+        return _PLAIN_HEADER
+    
+    if len(iv) != 16:
+        raise ValueError(f"Invalid IV. Expected 16 bytes, got {len(iv)}")
+    
+    return _HEADER.pack(HEADER_MAGIC, FLAG_ENCRYPTED, iv)
+
+
+def parse_header(buf) -> Optional[Tuple[bool, Optional[bytes], int]]:
+    """
+    Parse the payload metadata header from the start of an extracted buffer.
+    
+    Returns (is_encrypted, iv, body_offset), or None if the buffer carries no header.
+    Only the first few dozen bytes are inspected, never the payload body.
+    """
+    if len(buf) >= HEADER_SIZE and buf[:len(HEADER_MAGIC)] == HEADER_MAGIC:
+        _, flags, iv = _HEADER.unpack_from(buf)
+        is_encrypted = bool(flags & FLAG_ENCRYPTED)
+        return is_encrypted, (bytes(iv) if is_encrypted else None), HEADER_SIZE
+    
+    return _parse_legacy_header(buf)
+
+
+def _parse_legacy_header(buf) -> Optional[Tuple[bool, Optional[bytes], int]]:
+    if buf[:len(LEGACY_HEADER_MAGIC)] != LEGACY_HEADER_MAGIC:
+        return None
+    
+    flag_end = buf.find(b'|', len(LEGACY_HEADER_MAGIC), _LEGACY_SCAN_LIMIT)
+    if flag_end < 0:
+        return None
+    
+    iv_end = buf.find(b'|', flag_end + 1, _LEGACY_SCAN_LIMIT)
+    if iv_end < 0:
+        return None
+    
+    is_encrypted = buf[len(LEGACY_HEADER_MAGIC):flag_end] == b'True'
+    iv = bytes.fromhex(buf[flag_end + 1:iv_end].decode('utf-8')) if is_encrypted else None
+    return is_encrypted, iv, iv_end + 1
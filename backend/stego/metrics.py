@@ -7,7 +7,7 @@ import wave
 import cv2
 
 
-def calculate_psnr(original_path: str, stego_path: str) -> float:
+def _load_image_pair(original_path: str, stego_path: str):
     if not os.path.exists(original_path):
         raise FileNotFoundError(f"Original image not found: {original_path}")
     if not os.path.exists(stego_path):
@@ -24,11 +24,16 @@ def calculate_psnr(original_path: str, stego_path: str) -> float:
             f"Image dimensions don't match. Original: {original.size}, Stego: {stego.size}"
         )
     
-    original_array = np.array(original).astype(np.float64)
-    stego_array = np.array(stego).astype(np.float64)
-    
-    mse = np.mean((original_array - stego_array) ** 2)
-    
+    return np.asarray(original), np.asarray(stego)
+
+
+def _mse(original_array: np.ndarray, stego_array: np.ndarray) -> float:
+    # uint8 differences fit int16 and their squares int32, so no float64 image copies are needed
+    diff = np.subtract(original_array, stego_array, dtype=np.int16)
+    return float(np.mean(np.square(diff, dtype=np.int32), dtype=np.float64))
+
+
+def _psnr(mse: float) -> float:
     if mse == 0:
         return 100.0
     
@@ -41,26 +46,7 @@ def calculate_psnr(original_path: str, stego_path: str) -> float:
     return round(psnr, 2)
 
 
-def calculate_ssim(original_path: str, stego_path: str) -> float:
-    if not os.path.exists(original_path):
-        raise FileNotFoundError(f"Original image not found: {original_path}")
-    if not os.path.exists(stego_path):
-        raise FileNotFoundError(f"Stego image not found: {stego_path}")
-    
-    try:
-        original = Image.open(original_path).convert('RGB')
-        stego = Image.open(stego_path).convert('RGB')
-    except Exception as e:
-        raise ValueError(f"Failed to open images: {str(e)}")
-    
-    if original.size != stego.size:
-        raise ValueError(
-            f"Image dimensions don't match. Original: {original.size}, Stego: {stego.size}"
-        )
-    
-    original_array = np.array(original)
-    stego_array = np.array(stego)
-    
+def _ssim(original_array: np.ndarray, stego_array: np.ndarray) -> float:
     try:
         ssim_value = ssim(original_array, stego_array, channel_axis=2, data_range=255)
     except Exception as e:
@@ -69,21 +55,16 @@ def calculate_ssim(original_path: str, stego_path: str) -> float:
     return round(float(ssim_value), 4)
 
 
+def calculate_psnr(original_path: str, stego_path: str) -> float:
+    return _psnr(_mse(*_load_image_pair(original_path, stego_path)))
+
+
+def calculate_ssim(original_path: str, stego_path: str) -> float:
+    return _ssim(*_load_image_pair(original_path, stego_path))
+
+
 def calculate_mse(original_path: str, stego_path: str) -> float:
-    if not os.path.exists(original_path) or not os.path.exists(stego_path):
-        raise FileNotFoundError("One or both images not found")
-    
-    original = Image.open(original_path).convert('RGB')
-    stego = Image.open(stego_path).convert('RGB')
-    
-    if original.size != stego.size:
-        raise ValueError("Image dimensions don't match")
-    
-    original_array = np.array(original).astype(np.float64)
-    stego_array = np.array(stego).astype(np.float64)
-    
-    mse = np.mean((original_array - stego_array) ** 2)
-    return round(float(mse), 4)
+    return round(_mse(*_load_image_pair(original_path, stego_path)), 4)
 
 
 def assess_quality(psnr: float, ssim: float) -> dict:
@@ -123,9 +104,13 @@ def assess_quality(psnr: float, ssim: float) -> dict:
 
 def calculate_metrics(original_path: str, stego_path: str) -> dict:
     try:
-        psnr = calculate_psnr(original_path, stego_path)
-        ssim_val = calculate_ssim(original_path, stego_path)
-        mse = calculate_mse(original_path, stego_path)
+        # Decode both images once and derive every metric from the same arrays
+        original_array, stego_array = _load_image_pair(original_path, stego_path)
+        mse_raw = _mse(original_array, stego_array)
+        
+        psnr = _psnr(mse_raw)
+        ssim_val = _ssim(original_array, stego_array)
+        mse = round(mse_raw, 4)
         
         quality = assess_quality(psnr, ssim_val)
         
@@ -242,11 +227,7 @@ def calculate_video_psnr(original_path: str, stego_path: str, max_frames: int =
             if original_frame.shape != stego_frame.shape:
                 raise ValueError("Video frame dimensions don't match")
             
-            original_array = original_frame.astype(np.float64)
-            stego_array = stego_frame.astype(np.float64)
-            
-            mse = np.mean((original_array - stego_array) ** 2)
-            total_mse += mse
+            total_mse += _mse(original_frame, stego_frame)
             frame_count += 1
         
         original_cap.release()
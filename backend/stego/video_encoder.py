@@ -1,6 +1,7 @@
 import numpy as np
 import cv2
 import struct
+from itertools import chain
 import os
 import tempfile
 
@@ -75,12 +76,12 @@ def encode_video_lsb(video_path: str, payload: bytes, output_path: str, bits_per
     # Magic: "VSTG" = Video STeGanography
     if store_params:
         header = b'VSTG' + struct.pack('BB', bits_per_channel, frame_skip) + struct.pack('>I', payload_length)
-        full_payload = header + payload
+        full_payload = chain(header, payload)
         header_info = f"with parameter header (10 bytes)"
     else:
         # Legacy format without parameter storage
         length_bytes = struct.pack('>I', payload_length)
-        full_payload = length_bytes + payload
+        full_payload = chain(length_bytes, payload)
         header_info = f"legacy format (4 bytes header)"
     
     payload_bits = []
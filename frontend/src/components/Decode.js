@@ -395,7 +395,7 @@ function Decode() {
 
           {decodeResult.is_binary ? (
             <div className="form-group" style={{ marginTop: '1.5rem' }}>
-              <label className="form-label">Binary Payload (Hex)</label>
+              <label className="form-label">Binary Payload (Base64)</label>
               <textarea
                 className="form-control"
                 rows="6"